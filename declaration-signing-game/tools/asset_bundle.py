@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Asset Bundles for Declaration of Independence Game
+Exports downloaded assets as a manifest plus a single indexed pack file, and
+imports packs on other machines without touching the public archives; packs
+built against another machine's manifest carry only the blobs it is missing
+"""
+
+import os
+import re
+import sys
+import json
+import mmap
+import struct
+import fnmatch
+import hashlib
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from download_assets import (
+    BLAKE2_DIGEST_SIZE, DOWNLOAD_CHUNK_SIZE, HistoricalAssetDownloader, hash_file
+)
+
+MANIFEST_FORMAT = "asset-manifest"
+MANIFEST_VERSION = 1
+DEFAULT_PACK_NAME = "assets.assetpack"
+
+# Pack layout: MAGIC, blobs back to back, JSON index, then a trailer of
+# (index offset, index length, MAGIC) so the index can be found from the end
+# and blobs read in place from a memory map
+PACK_MAGIC = b"ASSETPK1"
+PACK_TRAILER = struct.Struct("<QQ8s")
+
+# Digests from a pack become store paths, so they must be plain BLAKE2b hex
+DIGEST_PATTERN = re.compile(rf"[0-9a-f]{{{2 * BLAKE2_DIGEST_SIZE}}}")
+
+
+def load_manifest(path: str) -> Dict:
+    """Load a manifest written by the manifest command"""
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get("format") != MANIFEST_FORMAT:
+        raise ValueError(f"{path} is not an asset manifest")
+    return manifest
+
+
+def build_manifest(downloader: HistoricalAssetDownloader,
+                   id_patterns: Optional[List[str]] = None) -> Dict:
+    """Describe the assets present on this machine: id, digest, size and path
+
+    Only assets whose file or stored blob is actually on disk are listed,
+    so a peer never skips a blob this machine cannot produce.
+    """
+    assets = {}
+    for asset_id, info in sorted(downloader.source_log["downloads"].items()):
+        if id_patterns and not any(fnmatch.fnmatchcase(asset_id, p) for p in id_patterns):
+            continue
+        target_path = downloader.project_root / info["local_path"]
+        digest = info.get("file_blake2b")
+        if digest and downloader.store_path(digest).exists():
+            size = info["file_size"]
+        elif target_path.exists():
+            # Entries from before the blob store only carry an MD5
+            _, digest, size = hash_file(target_path)
+        else:
+            continue
+        assets[asset_id] = {
+            "digest": digest,
+            "size": size,
+            "path": info["local_path"],
+            "md5": info.get("file_hash")
+        }
+    return {
+        "format": MANIFEST_FORMAT,
+        "version": MANIFEST_VERSION,
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "assets": assets
+    }
+
+
+def blob_source(downloader: HistoricalAssetDownloader, asset_id: str, digest: str) -> Path:
+    """File holding the bytes of a blob, preferring the store"""
+    blob_path = downloader.store_path(digest)
+    if blob_path.exists():
+        return blob_path
+    return downloader.project_root / downloader.source_log["downloads"][asset_id]["local_path"]
+
+
+def export_pack(downloader: HistoricalAssetDownloader, output_path: Path,
+                base: Optional[Dict] = None, id_patterns: Optional[List[str]] = None) -> Dict:
+    """Write a pack of this machine's assets, omitting blobs listed in a base manifest
+
+    The index always holds the full manifest and source log entries; only
+    blob bytes are left out for a delta pack. Returns the index.
+    """
+    manifest = build_manifest(downloader, id_patterns)
+    known = {info["digest"] for info in (base or {}).get("assets", {}).values()}
+
+    index = {
+        "version": MANIFEST_VERSION,
+        "manifest": manifest,
+        "base_created_at": base.get("created_at") if base else None,
+        "downloads": {asset_id: downloader.source_log["downloads"][asset_id] for asset_id in manifest["assets"]},
+        "blobs": {}
+    }
+
+    temp_path = output_path.with_name(output_path.name + ".tmp")
+    with open(temp_path, 'wb') as f:
+        f.write(PACK_MAGIC)
+        # Each digest is written once, however many assets share it
+        for asset_id, info in manifest["assets"].items():
+            digest = info["digest"]
+            if digest in known or digest in index["blobs"]:
+                continue
+            offset = f.tell()
+            with open(blob_source(downloader, asset_id, digest), 'rb') as blob:
+                for chunk in iter(lambda: blob.read(DOWNLOAD_CHUNK_SIZE), b""):
+                    f.write(chunk)
+            index["blobs"][digest] = [offset, f.tell() - offset]
+
+        index_offset = f.tell()
+        index_bytes = json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        f.write(index_bytes)
+        f.write(PACK_TRAILER.pack(index_offset, len(index_bytes), PACK_MAGIC))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, output_path)
+    return index
+
+
+def read_index(pack: mmap.mmap) -> Dict:
+    """Read the JSON index of a memory-mapped pack"""
+    if len(pack) < len(PACK_MAGIC) + PACK_TRAILER.size or pack[:len(PACK_MAGIC)] != PACK_MAGIC:
+        raise ValueError("not an asset pack")
+    index_offset, index_length, magic = PACK_TRAILER.unpack(pack[-PACK_TRAILER.size:])
+    if magic != PACK_MAGIC:
+        raise ValueError("asset pack is truncated")
+    return json.loads(pack[index_offset:index_offset + index_length].decode("utf-8"))
+
+
+def plan_import(downloader: HistoricalAssetDownloader, index: Dict) -> Dict[str, List[str]]:
+    """Compare a pack's manifest with this machine and sort its assets by action
+
+    unchanged: same digest already in place; link: bytes already in the
+    store; unpack: bytes come from the pack; missing: neither has them.
+    """
+    plan = {"unchanged": [], "link": [], "unpack": [], "missing": []}
+    for asset_id, info in index["manifest"]["assets"].items():
+        if not isinstance(info.get("digest"), str) or not DIGEST_PATTERN.fullmatch(info["digest"]):
+            raise ValueError(f"{asset_id}: invalid digest {info.get('digest')!r} in the pack")
+    local = build_manifest(downloader)["assets"]
+    for asset_id, info in index["manifest"]["assets"].items():
+        current = local.get(asset_id)
+        if (current and current["digest"] == info["digest"] and current["path"] == info["path"]
+                and (downloader.project_root / info["path"]).exists()):
+            plan["unchanged"].append(asset_id)
+        elif downloader.store_path(info["digest"]).exists():
+            plan["link"].append(asset_id)
+        elif info["digest"] in index["blobs"]:
+            plan["unpack"].append(asset_id)
+        else:
+            plan["missing"].append(asset_id)
+    return plan
+
+
+def unpack_blob(downloader: HistoricalAssetDownloader, pack: mmap.mmap, digest: str, offset: int, size: int):
+    """Copy one blob from the pack into the store, verifying its BLAKE2b digest"""
+    blob_path = downloader.store_path(digest)
+    if blob_path.exists():
+        return
+    downloader.store_dir.mkdir(parents=True, exist_ok=True)
+    temp_path = blob_path.with_name(blob_path.name + ".tmp")
+    hash_blake2 = hashlib.blake2b(digest_size=BLAKE2_DIGEST_SIZE)
+    # Views are released explicitly so the map can close even on errors
+    with open(temp_path, 'wb') as f, memoryview(pack) as view:
+        for start in range(offset, offset + size, DOWNLOAD_CHUNK_SIZE):
+            with view[start:min(start + DOWNLOAD_CHUNK_SIZE, offset + size)] as chunk:
+                hash_blake2.update(chunk)
+                f.write(chunk)
+    if hash_blake2.hexdigest() != digest:
+        temp_path.unlink()
+        raise ValueError(f"blob {digest[:12]} is corrupt in the pack")
+    os.replace(temp_path, blob_path)
+
+
+def import_pack(downloader: HistoricalAssetDownloader, pack_path: Path, dry_run: bool = False) -> Dict[str, List[str]]:
+    """Apply the assets in a pack that differ from this machine
+
+    Blobs are verified as they are copied into the store, targets are
+    linked to them and the pack's source log entries replace ours.
+    Assets missing from both the pack and the store are reported, not
+    fetched; run the downloader for those.
+    """
+    with open(pack_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as pack:
+        index = read_index(pack)
+        plan = plan_import(downloader, index)
+        if dry_run:
+            return plan
+
+        project_root = downloader.project_root.resolve()
+        for asset_id in plan["unpack"] + plan["link"]:
+            info = index["manifest"]["assets"][asset_id]
+            target_path = (downloader.project_root / info["path"]).resolve()
+            if project_root not in target_path.parents:
+                raise ValueError(f"{asset_id}: path {info['path']} escapes the project root")
+            if asset_id in plan["unpack"]:
+                unpack_blob(downloader, pack, info["digest"], *index["blobs"][info["digest"]])
+            target_path.parent.mkdir(parents=True, exist_ok=True)
+            downloader.materialize(info["digest"], target_path)
+
+            entry = dict(
+                index["downloads"][asset_id],
+                file_blake2b=info["digest"],
+                file_size=info["size"],
+                store_path=str(downloader.store_path(info["digest"]).relative_to(downloader.project_root))
+            )
+            with downloader.lock:
+                downloader.source_log["downloads"][asset_id] = entry
+                downloader.index_blob(entry)
+
+    # One atomic rewrite instead of a journal record per asset
+    if plan["unpack"] or plan["link"]:
+        downloader.compact_source_log()
+    return plan
+
+
+def print_plan(plan: Dict[str, List[str]], dry_run: bool):
+    """Summarize an import plan"""
+    verb = "Would apply" if dry_run else "Applied"
+    print(f"{verb} {len(plan['unpack']) + len(plan['link'])} changed assets "
+          f"({len(plan['unpack'])} from the pack, {len(plan['link'])} from the local store), "
+          f"{len(plan['unchanged'])} unchanged")
+    for asset_id in plan["missing"]:
+        print(f"  MISSING: {asset_id} (not in this delta pack or the local store)")
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export and import downloaded assets as indexed pack files")
+    parser.add_argument("--project-root", default=".", help="Project root directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    manifest_parser = commands.add_parser("manifest", help="Write a manifest of the assets on this machine")
+    manifest_parser.add_argument("--output", default="asset_manifest.json", help="Where to write the manifest")
+
+    export_parser = commands.add_parser("export", help="Bundle downloaded assets into a pack")
+    export_parser.add_argument("--output", default=DEFAULT_PACK_NAME, help="Where to write the pack")
+    export_parser.add_argument("--base", help="Manifest from the receiving machine; its blobs are left out")
+    export_parser.add_argument("--id", dest="id_patterns", action="append",
+                               help="Export only asset ids matching this glob (repeatable)")
+
+    import_parser = commands.add_parser("import", help="Apply the assets in a pack that differ from this machine")
+    import_parser.add_argument("pack", help="Pack file to import")
+    import_parser.add_argument("--dry-run", action="store_true", help="Only show what would change")
+
+    args = parser.parse_args()
+    downloader = HistoricalAssetDownloader(args.project_root)
+
+    if args.command == "manifest":
+        manifest = build_manifest(downloader)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        print(f"Manifest of {len(manifest['assets'])} assets saved: {args.output}")
+
+    elif args.command == "export":
+        base = load_manifest(args.base) if args.base else None
+        started = time.perf_counter()
+        index = export_pack(downloader, Path(args.output), base, args.id_patterns)
+        blob_bytes = sum(size for _, size in index["blobs"].values())
+        print(f"Exported {len(index['manifest']['assets'])} assets, {len(index['blobs'])} blobs "
+              f"({blob_bytes / 1e6:.1f} MB) in {time.perf_counter() - started:.2f}s: {args.output}")
+
+    else:
+        started = time.perf_counter()
+        plan = import_pack(downloader, Path(args.pack), dry_run=args.dry_run)
+        print_plan(plan, args.dry_run)
+        if not args.dry_run:
+            print(f"Imported in {time.perf_counter() - started:.2f}s")
+        if plan["missing"]:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Downloader Benchmark for Declaration of Independence Game
+Runs HistoricalAssetDownloader against a local stand-in for the public archives
+and records wall time, throughput, peak memory and per-phase timing as JSON
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import hashlib
+import platform
+import tempfile
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from download_assets import DEFAULT_SCHEDULE, SCHEDULES, HistoricalAssetDownloader
+from download_telemetry import DownloadTelemetry
+
+DEFAULT_CATALOG_SIZES = [10, 1000, 10000]
+DEFAULT_ASSET_SIZE = 16 * 1024
+SERVER_CHUNK_SIZE = 16 * 1024
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the downloader's per-asset progress output"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def asset_size(index: int, config: Dict) -> int:
+    """Deterministic size of a synthetic asset"""
+    low, high = config["asset_size"], config.get("asset_size_max") or config["asset_size"]
+    return random.Random(index).randint(low, max(low, high))
+
+
+def asset_body(index: int, size: int) -> bytes:
+    """Deterministic, per-asset unique body so the blob store can't dedupe it"""
+    block = hashlib.blake2b(str(index).encode(), digest_size=64).digest()
+    return (block * math.ceil(size / len(block)))[:size]
+
+
+class MockArchiveHandler(BaseHTTPRequestHandler):
+    """Serves /asset/<n>.jpg with configurable latency, bandwidth and errors"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without TCP_NODELAY each
+    # response stalls on the client's delayed ACK
+    disable_nagle_algorithm = True
+    config: Dict = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.handle_asset(send_body=False)
+
+    def do_GET(self):
+        self.handle_asset(send_body=True)
+
+    def send_empty(self, status: int, headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def handle_asset(self, send_body: bool):
+        config = self.config
+        if config["latency"]:
+            time.sleep(config["latency"])
+
+        name = self.path.split("?")[0].rsplit("/", 1)[-1]
+        if not self.path.startswith("/asset/") or not name.endswith(".jpg"):
+            self.send_empty(404)
+            return
+        if config["error_rate"] and random.random() < config["error_rate"]:
+            self.send_empty(503, {"Retry-After": "0"})
+            return
+
+        index = int(name[:-4])
+        size = asset_size(index, config)
+        etag = f'"{index}-{size}"'
+
+        if config["etag"] and self.headers.get("If-None-Match") == etag:
+            self.send_empty(304, {"ETag": etag})
+            return
+
+        start, status = 0, 200
+        range_header = self.headers.get("Range", "")
+        if config["range"] and range_header.startswith("bytes="):
+            start = int(range_header[6:].split("-")[0])
+            if start >= size:
+                self.send_empty(416, {"Content-Range": f"bytes */{size}"})
+                return
+            status = 206
+
+        self.send_response(status)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(size - start))
+        if config["etag"]:
+            self.send_header("ETag", etag)
+        if config["range"]:
+            self.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+        self.end_headers()
+        if not send_body:
+            return
+
+        body = memoryview(asset_body(index, size))[start:]
+        for offset in range(0, len(body), SERVER_CHUNK_SIZE):
+            chunk = body[offset:offset + SERVER_CHUNK_SIZE]
+            self.wfile.write(chunk)
+            if config["bandwidth"]:
+                time.sleep(len(chunk) / config["bandwidth"])
+
+
+def serve_mock_archive(config: Dict, port_queue):
+    """Run the mock archive in its own process so it doesn't skew RSS"""
+    MockArchiveHandler.config = config
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockArchiveHandler)
+    server.daemon_threads = True
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def write_catalog(project_root: Path, base_url: str, count: int):
+    """Write a synthetic JSON Lines catalog of count assets"""
+    (project_root / "data").mkdir(parents=True, exist_ok=True)
+    with open(project_root / "data" / "asset_catalog.jsonl", 'w', encoding='utf-8') as f:
+        for index in range(count):
+            f.write(json.dumps({
+                "id": f"bench_{index:06d}",
+                "name": f"Benchmark asset {index}",
+                "url": f"{base_url}/asset/{index}.jpg",
+                "description": "Synthetic benchmark asset",
+                "source_org": "Mock Archive",
+                "asset_type": "portrait",
+                "target_path": f"assets/bench/{index // 1000:03d}/{index:06d}.jpg",
+                "metadata": {}
+            }) + "\n")
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def run_catalog(count: int, base_url: str, host: str, args) -> Dict:
+    """Benchmark one catalog size through download, verify and refresh phases"""
+    baseline_rss = peak_rss_mb()
+    phases = {}
+    with tempfile.TemporaryDirectory(prefix="asset_bench_") as temp_dir:
+        project_root = Path(temp_dir)
+        write_catalog(project_root, base_url, count)
+        options = {
+            "max_workers": args.workers,
+            "schedule": args.schedule,
+            "max_bandwidth": args.max_bandwidth,
+            "host_rate_limits": {host: (args.host_rate, max(1, int(args.host_rate)))}
+        }
+
+        telemetry = None if args.no_telemetry else DownloadTelemetry()
+        started = time.perf_counter()
+        downloader = HistoricalAssetDownloader(str(project_root), telemetry=telemetry, **options)
+        downloader.asset_catalog = downloader.build_asset_catalog()
+        phases["catalog_load"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with quiet():
+            results = downloader.download_all_assets()
+        phases["download"] = time.perf_counter() - started
+
+        downloads = downloader.source_log["downloads"]
+        bytes_downloaded = sum(info.get("file_size", 0) for info in downloads.values())
+        attempts = sum(info.get("attempts", 0) for info in downloads.values())
+
+        started = time.perf_counter()
+        with quiet():
+            HistoricalAssetDownloader(str(project_root), **options).verify_asset_integrity(deep=True)
+        phases["verify_deep"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with quiet():
+            HistoricalAssetDownloader(str(project_root), **options).verify_asset_integrity(deep=True)
+        phases["verify_deep_cached"] = time.perf_counter() - started
+
+        if not args.skip_refresh:
+            started = time.perf_counter()
+            with quiet():
+                HistoricalAssetDownloader(str(project_root), refresh=True, **options).download_all_assets()
+            phases["refresh"] = time.perf_counter() - started
+
+    successful = sum(1 for ok in results.values() if ok)
+    download_phases = {}
+    if telemetry is not None:
+        summary = telemetry.summary()
+        download_phases = {
+            name: {key: stats[key] for key in ("total_s", "p50_ms", "p99_ms")}
+            for name, stats in summary["phases"].items()
+        }
+        download_phases.update(summary["session_phases_s"])
+    return {
+        "catalog_size": count,
+        "successful": successful,
+        "failed": count - successful,
+        "wall_time_s": round(sum(phases.values()), 4),
+        "bytes_downloaded": bytes_downloaded,
+        "download_bytes_per_s": round(bytes_downloaded / phases["download"], 1) if phases["download"] else None,
+        "assets_per_s": round(count / phases["download"], 2) if phases["download"] else None,
+        "request_attempts": attempts,
+        "peak_rss_mb": peak_rss_mb(),
+        "baseline_rss_mb": baseline_rss,
+        "phases_s": {name: round(seconds, 4) for name, seconds in phases.items()},
+        "download_phases": download_phases
+    }
+
+
+def run_catalog_isolated(count: int, base_url: str, host: str, args) -> Dict:
+    """Run one catalog size in a fresh process, since peak RSS only ever grows"""
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(run_catalog, count, base_url, host, args).result()
+
+
+def compare_results(previous: Dict, current: Dict):
+    """Print download wall-time and throughput changes against an earlier run"""
+    earlier = {run["catalog_size"]: run for run in previous.get("runs", [])}
+    print("\nComparison with previous run:")
+    for run in current["runs"]:
+        before = earlier.get(run["catalog_size"])
+        if not before:
+            continue
+        for key in ("wall_time_s", "download_bytes_per_s", "peak_rss_mb"):
+            old, new = before.get(key), run.get(key)
+            if old and new:
+                print(f"  {run['catalog_size']:>6} assets {key}: {old} -> {new} ({(new - old) / old * 100:+.1f}%)")
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the historical asset downloader against a mock archive")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_CATALOG_SIZES,
+                        help="Catalog sizes to benchmark")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent transfers")
+    parser.add_argument("--asset-size", type=int, default=DEFAULT_ASSET_SIZE, help="Asset size in bytes")
+    parser.add_argument("--asset-size-max", type=int,
+                        help="Upper bound for per-asset sizes (uniformly spread from --asset-size)")
+    parser.add_argument("--latency", type=float, default=0.005, help="Server latency per request in seconds")
+    parser.add_argument("--bandwidth", type=float, default=0,
+                        help="Per-connection bandwidth cap in bytes/s (0 = unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with 503")
+    parser.add_argument("--no-range", action="store_true", help="Ignore Range requests")
+    parser.add_argument("--no-etag", action="store_true", help="Send no ETags")
+    parser.add_argument("--host-rate", type=float, default=1000.0,
+                        help="Downloader rate limit for the mock host in requests/s")
+    parser.add_argument("--schedule", choices=SCHEDULES, default=DEFAULT_SCHEDULE,
+                        help="Downloader schedule (see download_assets.py --schedule)")
+    parser.add_argument("--max-bandwidth", type=float, help="Downloader bytes/s ceiling")
+    parser.add_argument("--no-telemetry", action="store_true",
+                        help="Run without per-phase download telemetry")
+    parser.add_argument("--skip-refresh", action="store_true", help="Skip the --refresh revalidation phase")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write results")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+
+    args = parser.parse_args()
+
+    config = {
+        "asset_size": args.asset_size,
+        "asset_size_max": args.asset_size_max,
+        "latency": args.latency,
+        "bandwidth": args.bandwidth,
+        "error_rate": args.error_rate,
+        "range": not args.no_range,
+        "etag": not args.no_etag
+    }
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve_mock_archive, args=(config, port_queue), daemon=True)
+    server.start()
+    host = f"127.0.0.1:{port_queue.get(timeout=10)}"
+    base_url = f"http://{host}"
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "workers": args.workers,
+        "server": config,
+        "runs": []
+    }
+
+    try:
+        for count in args.sizes:
+            print(f"Benchmarking {count} assets...")
+            run = run_catalog_isolated(count, base_url, host, args)
+            report["runs"].append(run)
+            print(f"  {run['wall_time_s']:.2f}s total, "
+                  f"{(run['download_bytes_per_s'] or 0) / 1e6:.2f} MB/s, "
+                  f"{run['assets_per_s']} assets/s, peak RSS {run['peak_rss_mb']} MB")
+            for phase, seconds in run["phases_s"].items():
+                print(f"    {phase}: {seconds:.3f}s")
+    finally:
+        server.terminate()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved: {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare_results(json.load(f), report)
+
+if __name__ == "__main__":
+    main()
@@ -6,16 +6,137 @@ Updates SourceLog.json with download information and sources
 """
 
 import os
+import re
+import sys
 import json
+import fnmatch
 import requests
 import hashlib
+import io
+import math
+import mimetypes
+import random
+import shutil
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse, urljoin
 from dataclasses import dataclass
+from requests.adapters import HTTPAdapter
 
-@dataclass
+from download_telemetry import DownloadTelemetry, NullTelemetry
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is only needed to stitch IIIF tiles
+    Image = None
+
+USER_AGENT = 'Historical Game Asset Downloader - Educational Use'
+
+# Politeness limits per archive host: (requests per second, burst size)
+HOST_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "www.loc.gov": (1.0, 2),
+    "loc.gov": (1.0, 2),
+    "tile.loc.gov": (2.0, 4),
+    "upload.wikimedia.org": (2.0, 4),
+}
+DEFAULT_HOST_RATE_LIMIT: Tuple[float, int] = (1.0, 1)
+DEFAULT_MAX_WORKERS = 4
+
+# Retry policy for transient failures: exponential backoff with full jitter
+DEFAULT_MAX_RETRIES = 4
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRY_BACKOFF_BASE = 1.0
+RETRY_BACKOFF_MAX = 30.0
+RETRY_AFTER_MAX = 300.0
+TRANSIENT_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+# Large chunks keep syscall overhead low while memory stays flat
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Download order: catalog order, priority (then smallest first) or smallest first
+SCHEDULES = ("catalog", "priority", "size")
+DEFAULT_SCHEDULE = "catalog"
+
+# IIIF Image API requests: {base}/{region}/{size}/{rotation}/{quality}.{format}
+IIIF_IMAGE_URL = re.compile(
+    r"^(?P<base>https?://.+?)/(?P<region>full|square|pct:[\d.,]+|\d+,\d+,\d+,\d+)"
+    r"/(?P<size>[^/]+)/(?P<rotation>!?[\d.]+)/(?P<quality>\w+)\.(?P<format>\w+)$"
+)
+DEFAULT_IIIF_MAX_DIMENSION = 4096
+IIIF_TILE_WORKERS = 4
+PIL_FORMATS = {"jpg": "JPEG", "jpeg": "JPEG", "png": "PNG", "tif": "TIFF", "webp": "WEBP"}
+
+# Godot-ready derivatives are written under assets/derived (see image_pipeline.py)
+DEFAULT_DERIVATIVE_MAX_SIZE = 2048
+
+# Journaled downloads are folded into SourceLog.json after this many records
+SOURCE_LOG_COMPACT_EVERY = 256
+
+# BLAKE2b digest size (bytes) recorded alongside the legacy MD5
+BLAKE2_DIGEST_SIZE = 32
+
+# Interrupted transfers are kept beside their target with this suffix
+PARTIAL_SUFFIX = ".part"
+
+def hash_file(path: Path) -> Tuple[str, str, int]:
+    """Hash a file in one pass, returning its MD5, BLAKE2b and size"""
+    hash_md5 = hashlib.md5()
+    hash_blake2 = hashlib.blake2b(digest_size=BLAKE2_DIGEST_SIZE)
+    file_size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+            hash_md5.update(chunk)
+            hash_blake2.update(chunk)
+            file_size += len(chunk)
+    return hash_md5.hexdigest(), hash_blake2.hexdigest(), file_size
+
+
+def read_catalog_lines(catalog_path: Path) -> Iterator[Tuple[str, Optional[Dict]]]:
+    """Yield each raw catalog line with its parsed record
+    
+    Blank lines and "#" comments come back with a record of None, so a
+    rewrite can keep them where they were.
+    """
+    with open(catalog_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            stripped = line.strip()
+            if not stripped or stripped.startswith("#"):
+                yield line, None
+            else:
+                yield line, json.loads(stripped)
+
+
+def iter_asset_catalog(catalog_path: Path, asset_type: Optional[str] = None,
+                       id_patterns: Optional[List[str]] = None,
+                       source_org: Optional[str] = None) -> Iterator["AssetDownload"]:
+    """Stream AssetDownload records from a JSON Lines catalog
+    
+    Filters are applied to each raw record before an AssetDownload is built,
+    so large catalogs never need to be held in memory at once. id_patterns
+    are shell-style globs; source_org matches case-insensitively.
+    """
+    for _, record in read_catalog_lines(catalog_path):
+        if record is None:
+            continue
+        if asset_type and record["asset_type"] != asset_type:
+            continue
+        if source_org and source_org.lower() not in record["source_org"].lower():
+            continue
+        if id_patterns and not any(fnmatch.fnmatchcase(record["id"], p) for p in id_patterns):
+            continue
+        yield AssetDownload(**record)
+
+
+# Slots keep per-record overhead small for large catalogs (Python 3.10+)
+@dataclass(**({"slots": True} if sys.version_info >= (3, 10) else {}))
 class AssetDownload:
     """Represents a historical asset to download"""
     id: str
@@ -26,24 +147,102 @@ class AssetDownload:
     asset_type: str  # 'map', 'portrait', 'document', 'building'
     target_path: str
     metadata: Dict
+    max_dimension: Optional[int] = None  # longest edge to request from IIIF services
+    priority: int = 0  # higher priorities download first with --schedule priority
+
+
+class TimeBudgetExceeded(Exception):
+    """Raised when a download is cut off by the session's time budget"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket pacing requests to a single host"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until the requested tokens are available"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Reserve the tokens up front so concurrent callers queue behind us
+            self.tokens -= tokens
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
     
 class HistoricalAssetDownloader:
     """Downloads and manages historical assets for the game"""
     
-    def __init__(self, project_root: str):
+    def __init__(self, project_root: str, max_workers: int = DEFAULT_MAX_WORKERS,
+                 refresh: bool = False, pool_size: Optional[int] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 iiif_max_dimension: int = DEFAULT_IIIF_MAX_DIMENSION,
+                 derivatives: bool = False,
+                 derivative_max_size: int = DEFAULT_DERIVATIVE_MAX_SIZE,
+                 power_of_two: bool = False,
+                 host_rate_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 telemetry: Optional[NullTelemetry] = None,
+                 schedule: str = DEFAULT_SCHEDULE,
+                 max_bandwidth: Optional[float] = None,
+                 max_duration: Optional[float] = None):
         self.project_root = Path(project_root)
+        self.catalog_path = self.project_root / "data" / "asset_catalog.jsonl"
+        self.max_workers = max(1, max_workers)
+        self.refresh = refresh
+        self.pool_size = pool_size or self.max_workers
+        self.max_retries = max(0, max_retries)
+        self.iiif_max_dimension = iiif_max_dimension
+        self.derivatives = derivatives
+        self.derivative_max_size = derivative_max_size
+        self.power_of_two = power_of_two
+        self.host_rate_limits = dict(HOST_RATE_LIMITS, **(host_rate_limits or {}))
+        self.telemetry = telemetry or NullTelemetry()
+        if schedule not in SCHEDULES:
+            raise ValueError(f"Unknown schedule '{schedule}', expected one of {', '.join(SCHEDULES)}")
+        self.schedule = schedule
+        self.max_duration = max_duration
         self.assets_dir = self.project_root / "assets"
         self.source_log_path = self.project_root / "data" / "SourceLog.json"
+        self.source_log_journal_path = self.project_root / "tools" / "source_log_journal.jsonl"
         self.download_log_path = self.project_root / "tools" / "download_log.json"
+        self.partial_journal_path = self.project_root / "tools" / "partial_downloads.json"
+        self.verify_cache_path = self.project_root / "tools" / "verify_cache.json"
+        self.store_dir = self.assets_dir / ".store"
+        self.derived_dir = self.assets_dir / "derived"
         
-        # Create asset directories
-        self.create_asset_directories()
+        # Shared state touched by worker threads
+        self.lock = threading.Lock()
+        self.host_buckets: Dict[str, TokenBucket] = {}
+        self.sessions: Dict[str, requests.Session] = {}
         
-        # Load existing source log
+        # Global bytes/s ceiling shared by every transfer, allowing a one-second burst
+        self.bandwidth_bucket = (
+            TokenBucket(max_bandwidth, max(1, int(max_bandwidth))) if max_bandwidth else None
+        )
+        # Monotonic deadline for the current download session, if budgeted
+        self.deadline: Optional[float] = None
+        self.skipped: List[str] = []
+        
+        # Load existing source log and any interrupted transfers
         self.source_log = self.load_source_log()
+        self.partial_journal = self.load_partial_journal()
+        
+        # Downloads with a stored blob, keyed by source URL and by ETag
+        self.asset_ids_by_url: Dict[str, str] = {}
+        self.asset_ids_by_etag: Dict[Tuple[str, str, Optional[int]], str] = {}
+        for download_info in self.source_log["downloads"].values():
+            self.index_blob(download_info)
         
-        # Asset catalog
-        self.asset_catalog = self.build_asset_catalog()
+        # Asset catalog is read lazily; verification never needs it
+        self._asset_catalog: Optional[List[AssetDownload]] = None
         
     def create_asset_directories(self):
         """Create all necessary asset directories"""
@@ -61,263 +260,957 @@ class HistoricalAssetDownloader:
             (self.project_root / dir_path).mkdir(parents=True, exist_ok=True)
             
     def load_source_log(self) -> Dict:
-        """Load existing SourceLog.json"""
+        """Load existing SourceLog.json plus any journaled downloads not yet compacted"""
         try:
             with open(self.source_log_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                source_log = json.load(f)
         except FileNotFoundError:
-            return {"sources": {}, "downloads": {}}
+            source_log = {"sources": {}}
+        source_log.setdefault("downloads", {})
+        
+        self.journal_records = 0
+        complete_length = 0
+        last_line = b""
+        last_parsed = False
+        try:
+            with open(self.source_log_journal_path, 'rb') as f:
+                for last_line in f:
+                    if last_line.endswith(b"\n"):
+                        complete_length += len(last_line)
+                    try:
+                        entry = json.loads(last_line)
+                    except ValueError:
+                        # A torn final line from a crash mid-append
+                        last_parsed = False
+                        continue
+                    last_parsed = True
+                    source_log["downloads"][entry["asset_id"]] = entry
+                    self.journal_records += 1
+        except FileNotFoundError:
+            return source_log
+            
+        # Make sure the next append starts on a line of its own: cut a torn
+        # tail, or end a complete final record that lost its newline
+        if last_line and not last_line.endswith(b"\n"):
+            if last_parsed:
+                with open(self.source_log_journal_path, 'ab') as f:
+                    f.write(b"\n")
+            else:
+                with open(self.source_log_journal_path, 'r+b') as f:
+                    f.truncate(complete_length)
+        return source_log
             
     def save_source_log(self):
-        """Save updated SourceLog.json"""
-        with open(self.source_log_path, 'w', encoding='utf-8') as f:
+        """Atomically save updated SourceLog.json"""
+        self.source_log_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.source_log_path.with_name(self.source_log_path.name + ".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
             json.dump(self.source_log, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.source_log_path)
+        
+    def append_source_log_journal(self, entry: Dict):
+        """Durably append one download entry to the source log journal
+        
+        Must be called with self.lock held.
+        """
+        self.source_log_journal_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.source_log_journal_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.journal_records += 1
+        
+    def compact_source_log(self):
+        """Fold the journal into SourceLog.json and start a fresh journal"""
+        with self.lock:
+            self.save_source_log()
+            try:
+                self.source_log_journal_path.unlink()
+            except FileNotFoundError:
+                pass
+            self.journal_records = 0
             
-    def build_asset_catalog(self) -> List[AssetDownload]:
+    def iter_catalog(self, asset_type: Optional[str] = None, id_patterns: Optional[List[str]] = None,
+                     source_org: Optional[str] = None) -> Iterator[AssetDownload]:
+        """Stream matching assets from the catalog file"""
+        return iter_asset_catalog(self.catalog_path, asset_type, id_patterns, source_org)
+        
+    def build_asset_catalog(self, **filters) -> List[AssetDownload]:
         """Build catalog of assets to download"""
-        return [
-            # Philadelphia Maps
-            AssetDownload(
-                id="philly_map_1752",
-                name="Plan of Philadelphia 1752",
-                url="https://www.loc.gov/resource/g3824p.pm008500/",
-                description="Nicholas Scull map of Philadelphia showing street grid",
-                source_org="Library of Congress",
-                asset_type="map",
-                target_path="assets/maps/philadelphia_1752.jpg",
-                metadata={
-                    "year": 1752,
-                    "cartographer": "Nicholas Scull",
-                    "scale": "Historical reference",
-                    "coverage": "Philadelphia street grid"
-                }
-            ),
-            AssetDownload(
-                id="philly_map_1777",
-                name="Plan of Philadelphia 1777",
-                url="https://www.loc.gov/resource/g3824p.ar133800/",
-                description="Revolutionary War era Philadelphia map",
-                source_org="Library of Congress",
-                asset_type="map", 
-                target_path="assets/maps/philadelphia_1777.jpg",
-                metadata={
-                    "year": 1777,
-                    "coverage": "Philadelphia during Revolutionary War",
-                    "relevance": "Post-Declaration street layout"
-                }
-            ),
-            
-            # Independence Hall HABS Drawings
-            AssetDownload(
-                id="independence_hall_exterior",
-                name="Independence Hall Exterior - HABS",
-                url="https://www.loc.gov/resource/hhh.pa1186.sheet.00001a/",
-                description="Historic American Buildings Survey exterior view",
-                source_org="Library of Congress - HABS", 
-                asset_type="building",
-                target_path="assets/interiors/independence_hall_exterior.jpg",
-                metadata={
-                    "survey": "HABS PA-1186",
-                    "building": "Independence Hall",
-                    "view": "South facade"
-                }
-            ),
-            AssetDownload(
-                id="assembly_room_interior",
-                name="Assembly Room Interior - HABS",
-                url="https://www.loc.gov/resource/hhh.pa1186.sheet.00005a/",
-                description="HABS documentation of Assembly Room interior",
-                source_org="Library of Congress - HABS",
-                asset_type="building",
-                target_path="assets/interiors/assembly_room_interior.jpg", 
-                metadata={
-                    "survey": "HABS PA-1186", 
-                    "room": "Assembly Room",
-                    "details": "Historical furnishing arrangement"
-                }
-            ),
-            
-            # Portraits from Wikimedia Commons (Public Domain)
-            AssetDownload(
-                id="jefferson_portrait",
-                name="Thomas Jefferson Portrait by Rembrandt Peale",
-                url="https://upload.wikimedia.org/wikipedia/commons/1/1e/Thomas_Jefferson_by_Rembrandt_Peale%2C_1800.jpg",
-                description="1800 portrait by Rembrandt Peale",
-                source_org="Wikimedia Commons",
-                asset_type="portrait",
-                target_path="assets/portraits/jefferson.jpg",
-                metadata={
-                    "subject": "Thomas Jefferson",
-                    "artist": "Rembrandt Peale", 
-                    "year": 1800,
-                    "license": "Public Domain"
-                }
-            ),
-            AssetDownload(
-                id="adams_portrait", 
-                name="John Adams Portrait by Gilbert Stuart",
-                url="https://upload.wikimedia.org/wikipedia/commons/d/d4/John_Adams_A18236.jpg",
-                description="Portrait by Gilbert Stuart, c. 1800-1815",
-                source_org="Wikimedia Commons",
-                asset_type="portrait",
-                target_path="assets/portraits/adams.jpg",
-                metadata={
-                    "subject": "John Adams",
-                    "artist": "Gilbert Stuart",
-                    "year": "c. 1800-1815",
-                    "license": "Public Domain" 
-                }
-            ),
-            AssetDownload(
-                id="franklin_portrait",
-                name="Benjamin Franklin Portrait by Joseph Duplessis", 
-                url="https://upload.wikimedia.org/wikipedia/commons/6/68/BenFranklinDuplessis.jpg",
-                description="1778 portrait by Joseph Duplessis",
-                source_org="Wikimedia Commons",
-                asset_type="portrait",
-                target_path="assets/portraits/franklin.jpg",
-                metadata={
-                    "subject": "Benjamin Franklin",
-                    "artist": "Joseph Duplessis", 
-                    "year": 1778,
-                    "license": "Public Domain"
-                }
-            ),
-            AssetDownload(
-                id="hancock_portrait",
-                name="John Hancock Portrait by John Singleton Copley",
-                url="https://upload.wikimedia.org/wikipedia/commons/3/3e/JohnHancockLarge.jpg",
-                description="c. 1770-1772 portrait by Copley", 
-                source_org="Wikimedia Commons",
-                asset_type="portrait",
-                target_path="assets/portraits/hancock.jpg",
-                metadata={
-                    "subject": "John Hancock",
-                    "artist": "John Singleton Copley",
-                    "year": "c. 1770-1772",
-                    "license": "Public Domain"
-                }
-            ),
-            AssetDownload(
-                id="washington_portrait",
-                name="George Washington Portrait by Gilbert Stuart",
-                url="https://upload.wikimedia.org/wikipedia/commons/b/b6/Gilbert_Stuart_Williamstown_Portrait_of_George_Washington.jpg",
-                description="The Gibbs-Channing-Avery Portrait, 1797",
-                source_org="Wikimedia Commons", 
-                asset_type="portrait",
-                target_path="assets/portraits/washington.jpg",
-                metadata={
-                    "subject": "George Washington",
-                    "artist": "Gilbert Stuart",
-                    "year": 1797,
-                    "license": "Public Domain"
-                }
-            ),
-            
-            # Historical Documents
-            AssetDownload(
-                id="dunlap_broadside_image",
-                name="Dunlap Broadside - Library of Congress",
-                url="https://tile.loc.gov/image-services/iiif/service:rbc:rbpe:rbpe02:rbpe021/rbpe0210/full/pct:100/0/default.jpg",
-                description="First printing of Declaration, July 4-5, 1776",
-                source_org="Library of Congress",
-                asset_type="document",
-                target_path="assets/documents/dunlap_broadside.jpg",
-                metadata={
-                    "document": "Declaration of Independence - First Printing",
-                    "printer": "John Dunlap",
-                    "date": "July 4-5, 1776",
-                    "significance": "First copies distributed to public"
-                }
-            ),
-            
-            # Colonial Interior Elements
-            AssetDownload(
-                id="windsor_chair_reference",
-                name="Colonial Windsor Chair Reference",
-                url="https://upload.wikimedia.org/wikipedia/commons/8/84/Windsor_chair_MET_DP105080.jpg", 
-                description="Period Windsor chair from Metropolitan Museum",
-                source_org="Wikimedia Commons - Met Museum",
-                asset_type="interior",
-                target_path="assets/interiors/windsor_chair.jpg",
-                metadata={
-                    "object": "Windsor Chair",
-                    "period": "18th century American",
-                    "museum": "Metropolitan Museum of Art",
-                    "license": "Public Domain"
-                }
-            )
+        return list(self.iter_catalog(**filters))
+        
+    @property
+    def asset_catalog(self) -> List[AssetDownload]:
+        """Asset catalog, loaded from the catalog file on first use"""
+        if self._asset_catalog is None:
+            self._asset_catalog = self.build_asset_catalog()
+        return self._asset_catalog
+        
+    @asset_catalog.setter
+    def asset_catalog(self, catalog: List[AssetDownload]):
+        self._asset_catalog = list(catalog)
+        
+    def host_bucket(self, url: str) -> TokenBucket:
+        """Return the rate limiter for the host serving a URL"""
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            bucket = self.host_buckets.get(host)
+            if bucket is None:
+                rate, capacity = self.host_rate_limits.get(host, DEFAULT_HOST_RATE_LIMIT)
+                bucket = TokenBucket(rate, capacity)
+                self.host_buckets[host] = bucket
+            return bucket
+            
+    def load_partial_journal(self) -> Dict:
+        """Load the journal of interrupted transfers"""
+        try:
+            with open(self.partial_journal_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+            
+    def save_partial_journal(self):
+        """Save the journal of interrupted transfers"""
+        with self.lock:
+            self.partial_journal_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.partial_journal_path, 'w', encoding='utf-8') as f:
+                json.dump(self.partial_journal, f, indent=2, ensure_ascii=False)
+                
+    def has_complete_file(self, asset_id: str, target_path: Path) -> bool:
+        """Check that a previously downloaded file exists and is not truncated"""
+        if not target_path.exists():
+            return False
+        expected_size = self.source_log["downloads"].get(asset_id, {}).get("file_size", 0)
+        return not expected_size or target_path.stat().st_size == expected_size
+        
+    def resume_offset(self, asset: AssetDownload, url: str, part_path: Path) -> int:
+        """Return the byte offset a partial download of url can resume from"""
+        journal_entry = self.partial_journal.get(asset.id)
+        if not part_path.exists():
+            return 0
+        if journal_entry is None or journal_entry.get("url") != url:
+            # Partial from an unknown or different source, can't trust it
+            self.discard_partial(asset.id, part_path)
+            return 0
+        return part_path.stat().st_size
+        
+    def record_partial(self, asset: AssetDownload, url: str, part_path: Path, offset: int,
+                       response: requests.Response):
+        """Journal an in-flight transfer so it can be resumed later"""
+        with self.lock:
+            self.partial_journal[asset.id] = {
+                "url": url,
+                "part_path": str(part_path.relative_to(self.project_root)),
+                "offset": offset,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "updated_at": time.strftime("%Y-%m-%d %H:%M:%S")
+            }
+        self.save_partial_journal()
+        
+    def update_partial_offset(self, asset_id: str, offset: int):
+        """Record how far an interrupted transfer got"""
+        with self.lock:
+            if asset_id not in self.partial_journal:
+                return
+            self.partial_journal[asset_id]["offset"] = offset
+            self.partial_journal[asset_id]["updated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.save_partial_journal()
+        
+    def discard_partial(self, asset_id: str, part_path: Path):
+        """Remove a partial file and its journal entry"""
+        try:
+            part_path.unlink()
+        except FileNotFoundError:
+            pass
+        with self.lock:
+            removed = self.partial_journal.pop(asset_id, None)
+        if removed is not None:
+            self.save_partial_journal()
+            
+    def conditional_headers(self, download_info: Optional[Dict]) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers from stored validators"""
+        headers = {}
+        if not download_info:
+            return headers
+        if download_info.get("etag"):
+            headers['If-None-Match'] = download_info["etag"]
+        if download_info.get("last_modified"):
+            headers['If-Modified-Since'] = download_info["last_modified"]
+        return headers
+        
+    def response_validators(self, response: requests.Response) -> Dict:
+        """Extract the cache validators describing the full remote resource"""
+        content_length = response.headers.get("Content-Length", "")
+        if response.status_code == 206:
+            # Content-Length only covers the range; the total follows the slash
+            content_length = response.headers.get("Content-Range", "").rpartition("/")[2]
+        return {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_length": int(content_length) if content_length.isdigit() else None
+        }
+        
+    def open_transfer(self, asset: AssetDownload, url: str, part_path: Path,
+                      conditional: Optional[Dict[str, str]] = None) -> Tuple[requests.Response, int, int]:
+        """Open the HTTP transfer of url for an asset, resuming a partial file if possible
+        
+        Returns the streaming response, the offset its body starts at and
+        the number of request attempts made.
+        A server that ignores the Range request gets a full fetch instead.
+        Conditional headers are only sent for fresh transfers, and the
+        response may then be a 304 with no body.
+        """
+        headers = {}
+        
+        resume_from = self.resume_offset(asset, url, part_path)
+        if resume_from:
+            headers['Range'] = f"bytes={resume_from}-"
+            # If-Range makes the server send the whole file if it changed
+            journal_entry = self.partial_journal.get(asset.id, {})
+            etag = journal_entry.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers['If-Range'] = etag
+            elif journal_entry.get("last_modified"):
+                headers['If-Range'] = journal_entry["last_modified"]
+        elif conditional:
+            headers.update(conditional)
+                
+        response, attempts = self.request_with_retries("GET", url, headers=headers, stream=True)
+        
+        if resume_from:
+            content_range = response.headers.get("Content-Range", "")
+            if response.status_code == 416 or (
+                response.status_code == 206
+                and not content_range.startswith(f"bytes {resume_from}-")
+            ):
+                # The partial no longer lines up with the remote file
+                response.close()
+                self.discard_partial(asset.id, part_path)
+                response, resume_from, retried = self.open_transfer(asset, url, part_path, conditional)
+                return response, resume_from, attempts + retried
+                
+        response.raise_for_status()
+        if response.status_code != 304:
+            self.check_content_type(asset, response)
+        
+        if resume_from and response.status_code == 206:
+            print(f"  Resuming at byte {resume_from}")
+        elif resume_from:
+            print("  Server ignored range request, fetching in full")
+            resume_from = 0
+            
+        return response, resume_from, attempts
+        
+    def check_content_type(self, asset: AssetDownload, response: requests.Response):
+        """Reject responses whose content type cannot be what target_path expects
+        
+        Catches archive landing pages (HTML) being saved as images.
+        """
+        content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        expected_type, _ = mimetypes.guess_type(asset.target_path)
+        if not content_type or not expected_type:
+            return
+        if content_type.split("/")[0] != expected_type.split("/")[0]:
+            response.close()
+            raise ValueError(f"Expected {expected_type} for {asset.target_path} but got {content_type}")
+            
+    def iiif_limits(self, info: Dict) -> Tuple[float, float, float]:
+        """Return the maxWidth, maxHeight and maxArea an IIIF image service allows"""
+        limits = dict(info)
+        # Image API 2.x nests the limits in the profile list
+        profile = info.get("profile")
+        if isinstance(profile, list):
+            for item in profile:
+                if isinstance(item, dict):
+                    limits.update(item)
+        max_width = limits.get("maxWidth", float("inf"))
+        max_height = limits.get("maxHeight", max_width)
+        return max_width, max_height, limits.get("maxArea", float("inf"))
+        
+    def plan_iiif_fetch(self, asset: AssetDownload) -> Optional[Dict]:
+        """Work out how to fetch an IIIF image at the resolution the game needs
+        
+        Returns None for URLs that are not IIIF Image API requests, or whose
+        info.json can't be read, so they are fetched as-is. Otherwise returns
+        either a single sized URL or, when the service caps output below the
+        wanted size, the tile layout to fetch and stitch locally.
+        """
+        match = IIIF_IMAGE_URL.match(asset.url)
+        if not match:
+            return None
+        base, image_format = match.group("base"), match.group("format")
+        
+        try:
+            response, _ = self.request_with_retries("GET", f"{base}/info.json")
+            response.raise_for_status()
+            info = response.json()
+            width, height = int(info["width"]), int(info["height"])
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+            print(f"  IIIF info.json unavailable ({type(e).__name__}: {str(e)}); fetching URL as-is")
+            return None
+        
+        # Never upscale past the archival original
+        max_dimension = asset.max_dimension or self.iiif_max_dimension
+        scale = min(1.0, max_dimension / max(width, height))
+        size = [max(1, round(width * scale)), max(1, round(height * scale))]
+        
+        plan = {
+            "base": base,
+            "format": image_format,
+            "quality": match.group("quality"),
+            "source_size": [width, height],
+            "size": size,
+            "tiles": None
+        }
+        max_width, max_height, max_area = self.iiif_limits(info)
+        within_limits = size[0] <= max_width and size[1] <= max_height and size[0] * size[1] <= max_area
+        
+        if not within_limits and info.get("tiles") and Image is not None:
+            plan["tiles"] = info["tiles"][0]
+            return plan
+        if not within_limits:
+            # Can't stitch, so take the largest size the service will render
+            fit = min(max_width / size[0], max_height / size[1], (max_area / (size[0] * size[1])) ** 0.5)
+            plan["size"] = size = [max(1, int(size[0] * fit)), max(1, int(size[1] * fit))]
+            print(f"  IIIF service limits output to {size[0]}x{size[1]}")
+            
+        plan["url"] = f"{base}/full/{size[0]},/0/{plan['quality']}.{image_format}"
+        return plan
+        
+    def fetch_iiif_tiles(self, asset: AssetDownload, plan: Dict, part_path: Path) -> int:
+        """Fetch IIIF tiles in parallel and stitch them into part_path
+        
+        Returns the number of tile requests made.
+        """
+        width, height = plan["source_size"]
+        tile_width = plan["tiles"]["width"]
+        tile_height = plan["tiles"].get("height", tile_width)
+        
+        # Use the coarsest scale factor that still covers the wanted size
+        wanted = max(plan["size"])
+        scale_factor = 1
+        for factor in sorted(plan["tiles"].get("scaleFactors", [1])):
+            if math.ceil(max(width, height) / factor) >= wanted:
+                scale_factor = factor
+                
+        region_width, region_height = tile_width * scale_factor, tile_height * scale_factor
+        regions = [
+            (x, y, min(region_width, width - x), min(region_height, height - y))
+            for y in range(0, height, region_height)
+            for x in range(0, width, region_width)
         ]
         
+        def fetch_tile(region: Tuple[int, int, int, int]) -> Tuple[Tuple[int, int, int, int], bytes, int]:
+            x, y, w, h = region
+            url = (f"{plan['base']}/{x},{y},{w},{h}/{math.ceil(w / scale_factor)},"
+                   f"/0/{plan['quality']}.{plan['format']}")
+            response, attempts = self.request_with_retries("GET", url)
+            response.raise_for_status()
+            self.check_content_type(asset, response)
+            self.throttle(len(response.content))
+            return region, response.content, attempts
+            
+        canvas = Image.new("RGB", (math.ceil(width / scale_factor), math.ceil(height / scale_factor)))
+        attempts = 0
+        with ThreadPoolExecutor(max_workers=IIIF_TILE_WORKERS) as executor:
+            for (x, y, _, _), data, tries in executor.map(fetch_tile, regions):
+                attempts += tries
+                with Image.open(io.BytesIO(data)) as tile:
+                    canvas.paste(tile.convert("RGB"), (x // scale_factor, y // scale_factor))
+                    
+        if list(canvas.size) != plan["size"]:
+            canvas = canvas.resize(tuple(plan["size"]), Image.LANCZOS)
+        canvas.save(part_path, format=PIL_FORMATS.get(plan["format"].lower(), "JPEG"))
+        print(f"  Stitched {len(regions)} IIIF tiles at scale 1/{scale_factor}")
+        return attempts
+        
+    def session_for(self, url: str) -> requests.Session:
+        """Return the pooled keep-alive session for the host serving a URL"""
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                session.headers['User-Agent'] = USER_AGENT
+                # Retries are handled in request_with_retries so they can be counted
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self.sessions[host] = session
+            return session
+            
+    def close_sessions(self):
+        """Close all pooled sessions"""
+        with self.lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+        for session in sessions:
+            session.close()
+            
+    def backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter for the given attempt number"""
+        return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** (attempt - 1)))
+        
+    def retry_after_delay(self, response: requests.Response) -> Optional[float]:
+        """Parse a Retry-After header given either as seconds or as an HTTP date"""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        return min(max(delay, 0.0), RETRY_AFTER_MAX)
+        
+    def request_with_retries(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                             stream: bool = False) -> Tuple[requests.Response, int]:
+        """Send a request through the host's pooled session, retrying transient failures
+        
+        Returns the response and the number of attempts it took. Connection
+        errors, timeouts and retryable status codes are retried with
+        exponential backoff; 429/503 responses honour Retry-After.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            # Wait for our turn on this host instead of sleeping globally
+            with self.telemetry.phase("rate_wait"):
+                self.host_bucket(url).acquire()
+            self.check_deadline()
+            self.telemetry.add_attempt()
+            try:
+                with self.telemetry.phase("connect"):
+                    response = self.session_for(url).request(
+                        method, url, headers=headers, timeout=30, stream=stream
+                    )
+            except TRANSIENT_ERRORS as e:
+                if attempt > self.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt)
+                print(f"  {type(e).__name__} on attempt {attempt}, retrying in {delay:.1f}s")
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt > self.max_retries:
+                    return response, attempt
+                delay = None
+                if response.status_code in (429, 503):
+                    delay = self.retry_after_delay(response)
+                if delay is None:
+                    delay = self.backoff_delay(attempt)
+                response.close()
+                print(f"  HTTP {response.status_code} on attempt {attempt}, retrying in {delay:.1f}s")
+            self.budget_sleep(delay)
+            
+    def check_deadline(self):
+        """Raise TimeBudgetExceeded once the session's time budget is spent"""
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise TimeBudgetExceeded("time budget reached")
+            
+    def budget_sleep(self, delay: float):
+        """Sleep before a retry, unless the retry would land past the time budget"""
+        if self.deadline is not None and time.monotonic() + delay >= self.deadline:
+            raise TimeBudgetExceeded("time budget reached while waiting to retry")
+        with self.telemetry.phase("backoff"):
+            time.sleep(delay)
+            
+    def throttle(self, byte_count: int):
+        """Charge received bytes to the bandwidth ceiling and enforce the time budget"""
+        if self.bandwidth_bucket is not None:
+            with self.telemetry.phase("bandwidth_wait"):
+                self.bandwidth_bucket.acquire(byte_count)
+        self.check_deadline()
+            
+    def stream_to_file(self, response: requests.Response, part_path: Path,
+                       resume_from: int, asset_id: str) -> Tuple[str, str, int]:
+        """Stream a response body into part_path, returning its MD5, BLAKE2b and size
+        
+        The caller moves the finished file into place, so the final path
+        never holds a half-written file. If the transfer fails the .part
+        file is kept and its offset journaled.
+        """
+        hash_md5 = hashlib.md5()
+        hash_blake2 = hashlib.blake2b(digest_size=BLAKE2_DIGEST_SIZE)
+        file_size = 0
+        
+        if resume_from:
+            # Seed the hashes with the bytes already on disk
+            with open(part_path, 'r+b') as f:
+                f.truncate(resume_from)
+                for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+                    hash_md5.update(chunk)
+                    hash_blake2.update(chunk)
+                    file_size += len(chunk)
+                    
+        # Hashing and bandwidth throttling are timed separately from the transfer
+        clock = time.perf_counter
+        started = clock()
+        hash_seconds = 0.0
+        throttle_seconds = 0.0
+        try:
+            with response, open(part_path, 'ab' if resume_from else 'wb') as f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                    hashed_at = clock()
+                    hash_md5.update(chunk)
+                    hash_blake2.update(chunk)
+                    hash_seconds += clock() - hashed_at
+                    file_size += len(chunk)
+                    self.telemetry.add_bytes(len(chunk))
+                    throttled_at = clock()
+                    self.throttle(len(chunk))
+                    throttle_seconds += clock() - throttled_at
+        except BaseException:
+            self.update_partial_offset(asset_id, file_size)
+            raise
+        finally:
+            self.telemetry.add_phase("hash", hash_seconds)
+            self.telemetry.add_phase("transfer", clock() - started - hash_seconds - throttle_seconds)
+            
+        return hash_md5.hexdigest(), hash_blake2.hexdigest(), file_size
+        
+    def store_path(self, digest: str) -> Path:
+        """Location of a blob in the content-addressed store"""
+        return self.store_dir / digest
+        
+    def etag_key(self, url: str, validators: Dict) -> Optional[Tuple[str, str, Optional[int]]]:
+        """Key identifying a strong ETag on a host, or None for weak/missing ETags"""
+        etag = validators.get("etag")
+        if not etag or etag.startswith("W/"):
+            return None
+        return urlparse(url).netloc.lower(), etag, validators.get("content_length")
+        
+    def index_blob(self, download_info: Dict):
+        """Remember which URL and ETag produced a stored blob"""
+        if not download_info.get("file_blake2b"):
+            return
+        self.asset_ids_by_url[download_info["url"]] = download_info["asset_id"]
+        key = self.etag_key(download_info["url"], download_info)
+        if key is not None:
+            self.asset_ids_by_etag[key] = download_info["asset_id"]
+            
+    def find_blob(self, url: str, validators: Optional[Dict] = None) -> Optional[Dict]:
+        """Find a stored download with the same content as a URL, if any
+        
+        Without validators only the URL is matched. With them only a strong
+        ETag and length from the same host count, since a URL's content may
+        have changed since it was stored.
+        """
+        downloads = self.source_log["downloads"]
+        with self.lock:
+            if validators is None:
+                match = downloads.get(self.asset_ids_by_url.get(url, ""))
+                if match is not None and match["url"] != url:
+                    match = None
+            else:
+                key = self.etag_key(url, validators)
+                match = downloads.get(self.asset_ids_by_etag.get(key, "")) if key is not None else None
+                if match is not None and self.etag_key(match["url"], match) != key:
+                    match = None
+        if match is None or not match.get("file_blake2b"):
+            return None
+        if not self.store_path(match["file_blake2b"]).exists():
+            return None
+        return match
+            
+    def materialize(self, digest: str, target_path: Path):
+        """Point target_path at a stored blob, by hardlink where possible"""
+        blob_path = self.store_path(digest)
+        temp_path = target_path.with_name(f".{target_path.name}.{digest[:8]}.tmp")
+        try:
+            temp_path.unlink()
+        except FileNotFoundError:
+            pass
+        try:
+            os.link(blob_path, temp_path)
+        except OSError:
+            # Cross-device or no hardlink support; fall back to a copy
+            shutil.copyfile(blob_path, temp_path)
+        os.replace(temp_path, target_path)
+        
+    def store_blob(self, part_path: Path, digest: str):
+        """Move a completed download into the content-addressed store"""
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        blob_path = self.store_path(digest)
+        if blob_path.exists():
+            # Same bytes already stored under another id or path
+            part_path.unlink()
+        else:
+            os.replace(part_path, blob_path)
+            
+    def build_download_entry(self, asset: AssetDownload, content: Dict, attempts: int,
+                             deduplicated: bool = False) -> Dict:
+        """Build the source log entry for a downloaded asset"""
+        return {
+            "asset_id": asset.id,
+            "name": asset.name,
+            "url": asset.url,
+            "local_path": asset.target_path,
+            "source_org": asset.source_org,
+            "description": asset.description,
+            "asset_type": asset.asset_type,
+            "metadata": asset.metadata,
+            "downloaded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "file_hash": content["file_hash"],
+            "file_blake2b": content["file_blake2b"],
+            "file_size": content["file_size"],
+            "store_path": str(self.store_path(content["file_blake2b"]).relative_to(self.project_root)),
+            "deduplicated": deduplicated,
+            "fetched_url": content.get("fetched_url", asset.url),
+            "iiif": content.get("iiif"),
+            "etag": content["etag"],
+            "last_modified": content["last_modified"],
+            "content_length": content["content_length"],
+            "attempts": attempts
+        }
+        
+    def record_download(self, entry: Dict):
+        """Add a finished download to the source log, its journal and the blob index
+        
+        When the asset's content changed, its previous blob is removed from
+        the store once no other download references it.
+        """
+        with self.telemetry.phase("log_write"):
+            with self.lock:
+                previous = self.source_log["downloads"].get(entry["asset_id"]) or {}
+                self.source_log["downloads"][entry["asset_id"]] = entry
+                self.index_blob(entry)
+                self.append_source_log_journal(entry)
+                old_digest = previous.get("file_blake2b")
+                if old_digest and old_digest != entry.get("file_blake2b") and not any(
+                    info.get("file_blake2b") == old_digest for info in self.source_log["downloads"].values()
+                ):
+                    try:
+                        self.store_path(old_digest).unlink()
+                    except FileNotFoundError:
+                        pass
+                compact = self.journal_records >= SOURCE_LOG_COMPACT_EVERY
+            if compact:
+                self.compact_source_log()
+            
+    def link_duplicate(self, asset: AssetDownload, target_path: Path, duplicate: Dict,
+                       attempts: int) -> bool:
+        """Satisfy an asset from an already stored blob instead of downloading it"""
+        with self.telemetry.phase("store"):
+            self.materialize(duplicate["file_blake2b"], target_path)
+        self.record_download(self.build_download_entry(asset, duplicate, attempts, deduplicated=True))
+        print(f"  Linked duplicate of {duplicate['asset_id']}: {asset.target_path}")
+        return True
+        
     def download_asset(self, asset: AssetDownload) -> bool:
-        """Download a single asset"""
+        """Download a single asset, resuming any earlier partial transfer
+        
+        Bodies land in the content-addressed store and target_path is a
+        link to them, so identical content is only stored (and, when the
+        URL or ETag is recognised, only downloaded) once.
+        """
         try:
             print(f"Downloading {asset.name}...")
             
             # Check if already downloaded
             target_path = self.project_root / asset.target_path
-            if target_path.exists():
-                print(f"  Already exists: {asset.target_path}")
-                return True
+            download_info = self.source_log["downloads"].get(asset.id)
+            conditional = {}
+            if self.has_complete_file(asset.id, target_path):
+                if not self.refresh:
+                    print(f"  Already exists: {asset.target_path}")
+                    return True
+                # Revalidate against the archive, unless the source moved
+                if download_info and download_info.get("url") == asset.url:
+                    conditional = self.conditional_headers(download_info)
+            elif target_path.exists():
+                print(f"  Truncated file found, downloading again: {target_path.name}")
                 
             # Create directory if needed
             target_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Download with headers
-            headers = {
-                'User-Agent': 'Historical Game Asset Downloader - Educational Use'
-            }
-            
-            response = requests.get(asset.url, headers=headers, timeout=30)
-            response.raise_for_status()
+            # Same URL already stored under another id or path
+            if not self.refresh:
+                duplicate = self.find_blob(asset.url)
+                if duplicate is not None:
+                    return self.link_duplicate(asset, target_path, duplicate, 0)
+                    
+            part_path = target_path.with_name(target_path.name + PARTIAL_SUFFIX)
+            iiif_plan = self.plan_iiif_fetch(asset) if self.iiif_max_dimension else None
             
-            # Save file
-            with open(target_path, 'wb') as f:
-                f.write(response.content)
+            if iiif_plan is not None and iiif_plan["tiles"]:
+                # The service won't render this size in one piece
+                fetch_url = iiif_plan["base"]
+                attempts = self.fetch_iiif_tiles(asset, iiif_plan, part_path)
+                file_hash, file_blake2b, file_size = hash_file(part_path)
+                validators = {"etag": None, "last_modified": None, "content_length": None}
+            else:
+                fetch_url = iiif_plan["url"] if iiif_plan else asset.url
+                attempts = 0
+                while True:
+                    response, resume_from, tries = self.open_transfer(asset, fetch_url, part_path, conditional)
+                    attempts += tries
                 
-            # Calculate hash
-            hash_md5 = hashlib.md5()
-            with open(target_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_md5.update(chunk)
+                    if response.status_code == 304:
+                        response.close()
+                        self.record_download(dict(
+                            download_info,
+                            validated_at=time.strftime("%Y-%m-%d %H:%M:%S"),
+                            attempts=attempts
+                        ))
+                        print(f"  Unchanged: {asset.target_path}")
+                        return True
+                    
+                    # A matching ETag means we already hold this body; skip the transfer
+                    validators = self.response_validators(response)
+                    duplicate = self.find_blob(asset.url, validators)
+                    if duplicate is not None:
+                        response.close()
+                        self.discard_partial(asset.id, part_path)
+                        return self.link_duplicate(asset, target_path, duplicate, attempts)
+                    
+                    self.record_partial(asset, fetch_url, part_path, resume_from, response)
+                
+                    # Stream to disk, hashing as the bytes arrive
+                    try:
+                        file_hash, file_blake2b, file_size = self.stream_to_file(
+                            response, part_path, resume_from, asset.id
+                        )
+                        break
+                    except TRANSIENT_ERRORS as e:
+                        # The .part file is kept, so the next attempt resumes it
+                        if attempts > self.max_retries:
+                            raise
+                        delay = self.backoff_delay(attempts)
+                        print(f"  Transfer interrupted ({type(e).__name__}), resuming in {delay:.1f}s")
+                        self.budget_sleep(delay)
+                    
+            with self.telemetry.phase("store"):
+                self.store_blob(part_path, file_blake2b)
+                self.materialize(file_blake2b, target_path)
+            with self.lock:
+                self.partial_journal.pop(asset.id, None)
+            self.save_partial_journal()
                     
             # Update source log
-            self.source_log["downloads"][asset.id] = {
-                "asset_id": asset.id,
-                "name": asset.name,
-                "url": asset.url,
-                "local_path": asset.target_path,
-                "source_org": asset.source_org,
-                "description": asset.description,
-                "asset_type": asset.asset_type,
-                "metadata": asset.metadata,
-                "downloaded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-                "file_hash": hash_md5.hexdigest(),
-                "file_size": target_path.stat().st_size
-            }
+            content = dict(
+                validators,
+                file_hash=file_hash,
+                file_blake2b=file_blake2b,
+                file_size=file_size,
+                fetched_url=fetch_url
+            )
+            if iiif_plan is not None:
+                content["iiif"] = {
+                    "source_size": iiif_plan["source_size"],
+                    "size": iiif_plan["size"],
+                    "tiled": bool(iiif_plan["tiles"])
+                }
+            self.record_download(self.build_download_entry(asset, content, attempts))
             
             print(f"  Downloaded: {asset.target_path}")
             return True
             
+        except TimeBudgetExceeded:
+            raise
         except Exception as e:
             print(f"  Error downloading {asset.name}: {str(e)}")
             return False
             
-    def download_all_assets(self) -> Dict[str, bool]:
-        """Download all assets in catalog"""
+    def derivative_stem(self, download_info: Dict) -> Path:
+        """Path prefix for an asset's derivatives, mirroring its place under assets/"""
+        local_path = Path(download_info["local_path"])
+        if local_path.parts and local_path.parts[0] == "assets":
+            local_path = local_path.relative_to("assets")
+        return self.derived_dir / local_path
+        
+    def process_derivatives(self, asset_ids: List[str]) -> Dict[str, bool]:
+        """Build Godot-ready derivatives for downloaded images in a process pool
+        
+        Assets whose source digest and settings match their recorded
+        derivatives, with every output still on disk, are skipped.
+        """
+        try:
+            import image_pipeline
+        except ImportError:
+            print("Pillow is required for derivatives (pip install Pillow); skipping")
+            return {}
+            
+        settings = image_pipeline.derivative_settings(
+            max_size=self.derivative_max_size, power_of_two=self.power_of_two
+        )
         results = {}
+        jobs = {}
+        
+        for asset_id in asset_ids:
+            download_info = self.source_log["downloads"].get(asset_id)
+            if not download_info:
+                continue
+            content_type, _ = mimetypes.guess_type(download_info["local_path"])
+            if not content_type or not content_type.startswith("image/"):
+                continue
+            source_digest = download_info.get("file_blake2b") or download_info.get("file_hash")
+            cached = download_info.get("derivatives") or {}
+            if (cached.get("source_digest") == source_digest and cached.get("settings") == settings
+                    and all((self.project_root / f["path"]).exists() for f in cached.get("files", []))):
+                results[asset_id] = True
+                continue
+            jobs[asset_id] = (download_info, source_digest)
+            
+        print(f"Building derivatives: {len(jobs)} to process, {len(results)} cached")
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(
+                    image_pipeline.build_derivatives,
+                    str(self.project_root / download_info["local_path"]),
+                    str(self.derivative_stem(download_info)),
+                    settings
+                ): asset_id
+                for asset_id, (download_info, _) in jobs.items()
+            }
+            for future in as_completed(futures):
+                asset_id = futures[future]
+                download_info, source_digest = jobs[asset_id]
+                try:
+                    outputs = future.result()
+                except Exception as e:
+                    print(f"  Error processing {download_info['name']}: {str(e)}")
+                    results[asset_id] = False
+                    continue
+                    
+                files = [
+                    dict(output, path=str(Path(output["path"]).relative_to(self.project_root)))
+                    for output in outputs
+                ]
+                self.record_download(dict(download_info, derivatives={
+                    "source_digest": source_digest,
+                    "settings": settings,
+                    "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "files": files
+                }))
+                print(f"  Derived {len(files)} files: {download_info['name']}")
+                results[asset_id] = True
+                
+        return results
+        
+    def estimate_size(self, asset: AssetDownload) -> Optional[int]:
+        """Expected transfer size of an asset, from the source log or a HEAD request
+        
+        Complete files cost nothing unless refreshing; None means unknown.
+        IIIF requests are unknown too, since the size actually fetched is
+        only planned from info.json when the download starts.
+        """
+        target_path = self.project_root / asset.target_path
+        if self.has_complete_file(asset.id, target_path):
+            if not self.refresh:
+                return 0
+            download_info = self.source_log["downloads"].get(asset.id)
+            if download_info and download_info.get("file_size") is not None:
+                return download_info["file_size"]
+        if self.iiif_max_dimension and IIIF_IMAGE_URL.match(asset.url):
+            return None
+        try:
+            response, _ = self.request_with_retries("HEAD", asset.url)
+            response.close()
+        except (requests.RequestException, TimeBudgetExceeded):
+            # Past the budget the asset is skipped anyway
+            return None
+        if not response.ok:
+            return None
+        try:
+            return int(response.headers["Content-Length"])
+        except (KeyError, ValueError):
+            return None
+            
+    def schedule_assets(self, assets: List[AssetDownload]) -> List[AssetDownload]:
+        """Order assets for download according to the configured schedule
+        
+        Sizes are probed concurrently; assets of unknown size go after
+        known ones of the same priority. Sorting is stable, so ties keep
+        their catalog order.
+        """
+        if self.schedule == "catalog":
+            return list(assets)
+            
+        with self.telemetry.phase("size_probe"):
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                sizes = dict(zip((asset.id for asset in assets), executor.map(self.estimate_size, assets)))
+                
+        def size_key(asset: AssetDownload) -> float:
+            size = sizes[asset.id]
+            return math.inf if size is None else size
+            
+        if self.schedule == "priority":
+            ordered = sorted(assets, key=lambda asset: (-asset.priority, size_key(asset)))
+        else:
+            ordered = sorted(assets, key=size_key)
+            
+        known = [size for size in sizes.values() if size is not None]
+        print(f"Schedule: {self.schedule}, {sum(known) / 1e6:.1f} MB estimated "
+              f"({len(sizes) - len(known)} of unknown size)")
+        return ordered
+        
+    def tracked_download(self, asset: AssetDownload) -> bool:
+        """Download an asset with its telemetry attributed to it
+        
+        Assets not started before the time budget runs out are skipped,
+        and transfers it cuts off keep their .part file for the next run.
+        """
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            with self.lock:
+                self.skipped.append(asset.id)
+            return False
+        self.telemetry.asset_started(asset.id)
+        try:
+            success = self.download_asset(asset)
+        except TimeBudgetExceeded:
+            print(f"  Time budget reached; keeping partial transfer of {asset.name}")
+            with self.lock:
+                self.skipped.append(asset.id)
+            success = False
+        self.telemetry.asset_finished(asset.id, success)
+        return success
+        
+    def download_all_assets(self) -> Dict[str, bool]:
+        """Download all assets in catalog concurrently, in scheduled order"""
+        self.create_asset_directories()
+        
+        # Pre-seed in catalog order so the report lists assets predictably
+        results = {asset.id: False for asset in self.asset_catalog}
+        self.skipped = []
+        # The budget covers size probing as well as the transfers
+        self.deadline = time.monotonic() + self.max_duration if self.max_duration else None
         
         print("Starting historical asset download...")
         print(f"Target directory: {self.assets_dir}")
         print(f"Total assets: {len(self.asset_catalog)}")
+        print(f"Concurrent transfers: {self.max_workers}")
+        if self.max_duration:
+            print(f"Time budget: {self.max_duration:.0f}s")
         print("-" * 60)
         
-        for asset in self.asset_catalog:
-            results[asset.id] = self.download_asset(asset)
-            time.sleep(1)  # Be respectful to servers
+        self.telemetry.start(len(self.asset_catalog))
+        schedule = self.schedule_assets(self.asset_catalog)
+        
+        # Workers take jobs in submission order, so the schedule holds;
+        # per-host token buckets in download_asset keep us polite to each archive
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self.tracked_download, asset): asset
+                for asset in schedule
+            }
+            for future in as_completed(futures):
+                results[futures[future].id] = future.result()
+        self.close_sessions()
+        self.deadline = None
+        
+        if self.derivatives:
+            with self.telemetry.phase("derivatives"):
+                self.process_derivatives([asset_id for asset_id, ok in results.items() if ok])
             
-        # Save updated source log
-        self.save_source_log()
+        # Fold the per-download journal into SourceLog.json
+        with self.telemetry.phase("compaction"):
+            self.compact_source_log()
+        self.telemetry.close()
         
         # Generate download report
         self.generate_download_report(results)
@@ -328,19 +1221,28 @@ class HistoricalAssetDownloader:
         """Generate download report"""
         successful = sum(1 for success in results.values() if success)
         total = len(results)
+        # Filters can select nothing; report that rather than dividing by zero
+        success_rate = successful / total * 100 if total else 0.0
         
         report = {
             "download_session": {
                 "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
                 "total_assets": total,
                 "successful_downloads": successful,
-                "failed_downloads": total - successful,
-                "success_rate": f"{successful/total*100:.1f}%"
+                "failed_downloads": total - successful - len(self.skipped),
+                "skipped_over_budget": len(self.skipped),
+                "success_rate": f"{success_rate:.1f}%",
+                "schedule": self.schedule
             },
             "asset_results": results,
+            "skipped_assets": self.skipped,
             "asset_summary_by_type": {}
         }
         
+        telemetry = self.telemetry.summary()
+        if telemetry is not None:
+            report["telemetry"] = telemetry
+        
         # Group by asset type
         for asset in self.asset_catalog:
             asset_type = asset.asset_type
@@ -364,7 +1266,9 @@ class HistoricalAssetDownloader:
         # Print summary
         print("-" * 60)
         print("DOWNLOAD COMPLETE")
-        print(f"Successful: {successful}/{total} ({successful/total*100:.1f}%)")
+        print(f"Successful: {successful}/{total} ({success_rate:.1f}%)")
+        if self.skipped:
+            print(f"Skipped (time budget): {len(self.skipped)}; rerun to continue")
         print(f"Report saved: {self.download_log_path}")
         print(f"Source log updated: {self.source_log_path}")
         
@@ -373,9 +1277,101 @@ class HistoricalAssetDownloader:
         for asset_type, info in report["asset_summary_by_type"].items():
             print(f"  {asset_type.title()}: {info['successful']}/{info['total']}")
             
-    def verify_asset_integrity(self) -> Dict[str, bool]:
-        """Verify downloaded assets exist and are valid"""
+        if telemetry is not None:
+            print(f"\nThroughput: {telemetry['bytes'] / 1e6:.1f} MB in {telemetry['wall_time_s']:.1f}s "
+                  f"({(telemetry['throughput_bytes_per_s'] or 0) / 1e6:.2f} MB/s), {telemetry['retries']} retries")
+            print("Time by phase (total / p50 / p99):")
+            for name, stats in telemetry["phases"].items():
+                print(f"  {name}: {stats['total_s']:.2f}s / {stats['p50_ms']:.1f}ms / {stats['p99_ms']:.1f}ms")
+            
+    def load_verify_cache(self) -> Dict:
+        """Load stat fingerprints of files whose hashes were already checked"""
+        try:
+            with open(self.verify_cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+            
+    def save_verify_cache(self, cache: Dict):
+        """Save stat fingerprints of verified files"""
+        self.verify_cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.verify_cache_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, indent=2, ensure_ascii=False)
+            
+    def verify_asset_hashes(self, candidates: Dict[str, Path]) -> Dict[str, bool]:
+        """Rehash files in parallel and compare them against the source log
+        
+        Files whose size and mtime match the cached fingerprint of an earlier
+        successful check are trusted without being read again.
+        """
         results = {}
+        cache = self.load_verify_cache()
+        to_hash = {}
+        
+        for asset_id, local_path in candidates.items():
+            download_info = self.source_log["downloads"][asset_id]
+            stat = local_path.stat()
+            cached = cache.get(asset_id)
+            if (cached and cached.get("size") == stat.st_size
+                    and cached.get("mtime_ns") == stat.st_mtime_ns
+                    and cached.get("md5") == download_info.get("file_hash")):
+                results[asset_id] = True
+            else:
+                to_hash[asset_id] = local_path
+                
+        def timed_hash(path: Path) -> Tuple[str, str, int, float]:
+            started = time.perf_counter()
+            md5, blake2, size = hash_file(path)
+            return md5, blake2, size, time.perf_counter() - started
+            
+        total_bytes = 0
+        started = time.perf_counter()
+        # hashlib releases the GIL on large buffers, so threads scale here
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(timed_hash, local_path): asset_id
+                for asset_id, local_path in to_hash.items()
+            }
+            for future in as_completed(futures):
+                asset_id = futures[future]
+                download_info = self.source_log["downloads"][asset_id]
+                md5, blake2, size, elapsed = future.result()
+                total_bytes += size
+                
+                valid = md5 == download_info.get("file_hash") and (
+                    not download_info.get("file_blake2b") or blake2 == download_info["file_blake2b"]
+                )
+                status = "OK" if valid else "Hash mismatch"
+                print(f"  {status}: {download_info['name']} "
+                      f"({size / 1e6:.1f} MB in {elapsed * 1000:.1f} ms)")
+                
+                results[asset_id] = valid
+                if valid:
+                    stat = to_hash[asset_id].stat()
+                    cache[asset_id] = {
+                        "size": stat.st_size,
+                        "mtime_ns": stat.st_mtime_ns,
+                        "md5": md5,
+                        "blake2b": blake2
+                    }
+                else:
+                    cache.pop(asset_id, None)
+        elapsed = time.perf_counter() - started
+        
+        self.save_verify_cache(cache)
+        
+        throughput = total_bytes / 1e6 / elapsed if elapsed > 0 else 0.0
+        print(f"Hashed {len(to_hash)} files ({total_bytes / 1e6:.1f} MB) in {elapsed:.2f}s "
+              f"({throughput:.1f} MB/s), {len(candidates) - len(to_hash)} unchanged since last check")
+        return results
+        
+    def verify_asset_integrity(self, deep: bool = False) -> Dict[str, bool]:
+        """Verify downloaded assets exist and are valid
+        
+        With deep=True the file contents are rehashed as well, not just sized.
+        """
+        results = {}
+        candidates = {}
         
         print("Verifying asset integrity...")
         
@@ -397,6 +1393,11 @@ class HistoricalAssetDownloader:
                 continue
                 
             results[asset_id] = True
+            if deep and download_info.get("file_hash"):
+                candidates[asset_id] = local_path
+                
+        if candidates:
+            results.update(self.verify_asset_hashes(candidates))
             
         verified = sum(1 for valid in results.values() if valid)
         total = len(results)
@@ -411,23 +1412,76 @@ def main():
     parser = argparse.ArgumentParser(description="Download historical assets for Declaration game")
     parser.add_argument("--project-root", default=".", help="Project root directory")
     parser.add_argument("--verify-only", action="store_true", help="Only verify existing assets")
+    parser.add_argument("--deep", action="store_true",
+                        help="With --verify-only, also rehash file contents")
     parser.add_argument("--asset-type", help="Download only specific asset type")
+    parser.add_argument("--id", dest="id_patterns", action="append",
+                        help="Download only asset ids matching this glob (repeatable)")
+    parser.add_argument("--source-org", help="Download only assets from this source organization")
+    parser.add_argument("--iiif-max-size", type=int, default=DEFAULT_IIIF_MAX_DIMENSION,
+                        help="Longest edge to request from IIIF image services (0 fetches URLs as-is)")
+    parser.add_argument("--derivatives", action="store_true",
+                        help="Build Godot-ready textures, mipmaps and thumbnails (requires Pillow)")
+    parser.add_argument("--derivative-max-size", type=int, default=DEFAULT_DERIVATIVE_MAX_SIZE,
+                        help="Longest edge of derived base textures")
+    parser.add_argument("--power-of-two", action="store_true",
+                        help="Round derived textures down to power-of-two dimensions")
+    parser.add_argument("--telemetry", action="store_true",
+                        help="Record per-phase timings and histograms in the download report")
+    parser.add_argument("--events", help="Write a JSON Lines telemetry event stream to this file")
+    parser.add_argument("--progress", action="store_true", help="Show live progress with ETA on stderr")
+    parser.add_argument("--catalog", help="Asset catalog file (JSON Lines)")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Revalidate existing assets and fetch only those that changed")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS,
+                        help="Number of concurrent transfers")
+    parser.add_argument("--pool-size", type=int,
+                        help="Keep-alive connections per host (defaults to --workers)")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES,
+                        help="Retries per asset for transient network errors")
+    parser.add_argument("--schedule", choices=SCHEDULES, default=DEFAULT_SCHEDULE,
+                        help="Download order: catalog order, priority then smallest first, or smallest "
+                             "first (priority and size send a HEAD request per asset to estimate sizes)")
+    parser.add_argument("--max-bandwidth", type=float,
+                        help="Total download ceiling in bytes/s across all transfers")
+    parser.add_argument("--max-duration", type=float,
+                        help="Time budget in seconds; remaining assets are skipped and cut-off "
+                             "transfers resume on the next run")
     
     args = parser.parse_args()
     
-    downloader = HistoricalAssetDownloader(args.project_root)
+    telemetry = None
+    if args.telemetry or args.events or args.progress:
+        telemetry = DownloadTelemetry(events_path=args.events, progress=args.progress)
+        
+    downloader = HistoricalAssetDownloader(
+        args.project_root,
+        max_workers=args.workers,
+        refresh=args.refresh,
+        pool_size=args.pool_size,
+        max_retries=args.max_retries,
+        iiif_max_dimension=args.iiif_max_size,
+        derivatives=args.derivatives,
+        derivative_max_size=args.derivative_max_size,
+        power_of_two=args.power_of_two,
+        telemetry=telemetry,
+        schedule=args.schedule,
+        max_bandwidth=args.max_bandwidth,
+        max_duration=args.max_duration
+    )
     
+    if args.catalog:
+        downloader.catalog_path = Path(args.catalog)
+        
     if args.verify_only:
-        downloader.verify_asset_integrity()
+        downloader.verify_asset_integrity(deep=args.deep)
     else:
-        if args.asset_type:
-            # Filter by asset type
-            filtered_catalog = [
-                asset for asset in downloader.asset_catalog 
-                if asset.asset_type == args.asset_type
-            ]
-            downloader.asset_catalog = filtered_catalog
-            
+        # Filter while streaming the catalog rather than after loading it
+        downloader.asset_catalog = downloader.build_asset_catalog(
+            asset_type=args.asset_type,
+            id_patterns=args.id_patterns,
+            source_org=args.source_org
+        )
         downloader.download_all_assets()
         
 if __name__ == "__main__":
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Download Telemetry for Declaration of Independence Game asset tools
+Records per-asset phase timings, bytes and retries, streams them as JSON Lines
+events, shows live progress with an ETA and summarizes them as histograms
+"""
+
+import sys
+import json
+import math
+import time
+import threading
+import contextlib
+from typing import Dict, List, Optional, TextIO
+
+# Phases timed on the download hot path
+PHASES = ["rate_wait", "connect", "backoff", "transfer", "bandwidth_wait", "hash", "store", "log_write"]
+
+PROGRESS_INTERVAL = 0.5
+
+# nullcontext is reusable, so disabled phases allocate nothing
+NULL_PHASE = contextlib.nullcontext()
+
+
+def format_duration(seconds: float) -> str:
+    """Format seconds as H:MM:SS or M:SS"""
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def histogram_ms(values: List[float]) -> Dict[str, int]:
+    """Bucket durations (seconds) into power-of-two millisecond bins"""
+    buckets: Dict[str, int] = {}
+    for value in values:
+        upper = 1
+        while value * 1000 >= upper:
+            upper *= 2
+        label = f"<{upper}ms"
+        buckets[label] = buckets.get(label, 0) + 1
+    return dict(sorted(buckets.items(), key=lambda item: int(item[0][1:-2])))
+
+
+class NullTelemetry:
+    """Telemetry that records nothing; the default, so disabled costs ~nothing"""
+
+    enabled = False
+
+    def start(self, total_assets: int):
+        pass
+
+    def asset_started(self, asset_id: str):
+        pass
+
+    def asset_finished(self, asset_id: str, success: bool):
+        pass
+
+    def phase(self, name: str):
+        return NULL_PHASE
+
+    def add_phase(self, name: str, seconds: float):
+        pass
+
+    def add_bytes(self, count: int):
+        pass
+
+    def add_attempt(self):
+        pass
+
+    def summary(self) -> Optional[Dict]:
+        return None
+
+    def close(self):
+        pass
+
+
+class DownloadTelemetry(NullTelemetry):
+    """Collects per-asset phase timings from the downloader's worker threads
+
+    Phases are attributed to the asset the calling thread is working on;
+    calls from threads with no current asset count as session-level time.
+    """
+
+    enabled = True
+
+    def __init__(self, events_path: Optional[str] = None, progress: bool = False,
+                 progress_stream: TextIO = sys.stderr):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.events = open(events_path, 'a', encoding='utf-8') if events_path else None
+        self.progress = progress
+        self.progress_stream = progress_stream
+        self.assets: Dict[str, Dict] = {}
+        self.session_phases: Dict[str, float] = {}
+        self.total_assets = 0
+        self.finished = 0
+        self.failed = 0
+        self.bytes = 0
+        self.started_at = time.perf_counter()
+        self.last_progress = 0.0
+
+    def emit(self, event: str, **fields):
+        """Append one event to the JSON Lines stream; call with self.lock held"""
+        if self.events is not None:
+            self.events.write(json.dumps(dict(ts=round(time.time(), 6), event=event, **fields)) + "\n")
+
+    def start(self, total_assets: int):
+        with self.lock:
+            self.total_assets = total_assets
+            self.started_at = time.perf_counter()
+            self.emit("session_start", total_assets=total_assets)
+
+    def asset_started(self, asset_id: str):
+        record = {"phases": {}, "bytes": 0, "attempts": 0, "started": time.perf_counter()}
+        self.local.record = record
+        with self.lock:
+            self.assets[asset_id] = record
+            self.emit("asset_start", asset_id=asset_id)
+
+    def asset_finished(self, asset_id: str, success: bool):
+        record = self.assets[asset_id]
+        record["elapsed"] = time.perf_counter() - record["started"]
+        record["success"] = success
+        self.local.record = None
+        with self.lock:
+            self.finished += 1
+            self.failed += 0 if success else 1
+            self.emit(
+                "asset_done",
+                asset_id=asset_id,
+                success=success,
+                elapsed_s=round(record["elapsed"], 6),
+                bytes=record["bytes"],
+                attempts=record["attempts"],
+                bytes_per_s=round(record["bytes"] / record["elapsed"], 1) if record["elapsed"] else None,
+                phases_s={name: round(value, 6) for name, value in record["phases"].items()}
+            )
+        self.show_progress(force=True)
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - started)
+
+    def add_phase(self, name: str, seconds: float):
+        record = getattr(self.local, "record", None)
+        if record is not None:
+            record["phases"][name] = record["phases"].get(name, 0.0) + seconds
+        else:
+            with self.lock:
+                self.session_phases[name] = self.session_phases.get(name, 0.0) + seconds
+                self.emit("phase", name=name, seconds=round(seconds, 6))
+
+    def add_bytes(self, count: int):
+        record = getattr(self.local, "record", None)
+        if record is not None:
+            record["bytes"] += count
+        with self.lock:
+            self.bytes += count
+        self.show_progress()
+
+    def add_attempt(self):
+        record = getattr(self.local, "record", None)
+        if record is not None:
+            record["attempts"] += 1
+
+    def show_progress(self, force: bool = False):
+        """Redraw the one-line progress display, at most every PROGRESS_INTERVAL"""
+        if not self.progress:
+            return
+        now = time.perf_counter()
+        with self.lock:
+            if not force and now - self.last_progress < PROGRESS_INTERVAL:
+                return
+            self.last_progress = now
+            elapsed = now - self.started_at
+            rate = self.bytes / elapsed if elapsed else 0.0
+            remaining = self.total_assets - self.finished
+            eta = format_duration(elapsed / self.finished * remaining) if self.finished else "--:--"
+            line = (f"\r[{self.finished}/{self.total_assets}] {self.failed} failed, "
+                    f"{self.bytes / 1e6:.1f} MB at {rate / 1e6:.2f} MB/s, ETA {eta}  ")
+            self.progress_stream.write(line)
+            self.progress_stream.flush()
+
+    def summary(self) -> Dict:
+        """Aggregate timings for the download report"""
+        with self.lock:
+            records = [record for record in self.assets.values() if "elapsed" in record]
+            wall_time = time.perf_counter() - self.started_at
+            phases = {}
+            for name in PHASES + sorted({n for r in records for n in r["phases"]} - set(PHASES)):
+                values = sorted(r["phases"][name] for r in records if name in r["phases"])
+                if not values:
+                    continue
+                phases[name] = {
+                    "count": len(values),
+                    "total_s": round(sum(values), 4),
+                    "mean_ms": round(sum(values) / len(values) * 1000, 3),
+                    "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+                    "p90_ms": round(percentile(values, 0.90) * 1000, 3),
+                    "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+                    "max_ms": round(values[-1] * 1000, 3),
+                    "histogram": histogram_ms(values)
+                }
+            elapsed = sorted(r["elapsed"] for r in records)
+            attempts = sum(r["attempts"] for r in records)
+            slowest = sorted(self.assets.items(), key=lambda item: item[1].get("elapsed", 0), reverse=True)
+            return {
+                "wall_time_s": round(wall_time, 4),
+                "assets": len(records),
+                "bytes": self.bytes,
+                "throughput_bytes_per_s": round(self.bytes / wall_time, 1) if wall_time else None,
+                "attempts": attempts,
+                "retries": max(0, attempts - sum(1 for r in records if r["attempts"])),
+                "asset_time_ms": {
+                    "p50": round(percentile(elapsed, 0.50) * 1000, 3),
+                    "p90": round(percentile(elapsed, 0.90) * 1000, 3),
+                    "p99": round(percentile(elapsed, 0.99) * 1000, 3),
+                    "histogram": histogram_ms(elapsed)
+                },
+                "phases": phases,
+                "session_phases_s": {name: round(value, 4) for name, value in self.session_phases.items()},
+                "slowest_assets": [
+                    {"asset_id": asset_id, "elapsed_s": round(record["elapsed"], 4), "bytes": record["bytes"]}
+                    for asset_id, record in slowest[:5] if "elapsed" in record
+                ]
+            }
+
+    def close(self):
+        if self.progress:
+            self.progress_stream.write("\n")
+            self.progress_stream.flush()
+        with self.lock:
+            if self.events is not None:
+                self.emit("session_done", bytes=self.bytes, finished=self.finished, failed=self.failed)
+                self.events.close()
+                self.events = None
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Game Data Index for Declaration of Independence Game
+Loads signers.json, timeline.json, characters.json and SourceLog.json once,
+indexes them for lookups, validates their cross-references in a single pass
+and exports a minified bundle the game and tools can load without reparsing
+"""
+
+import os
+import re
+import json
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DATA_FILES = {
+    "source_log": "SourceLog.json",
+    "signers": "signers.json",
+    "timeline": "timeline.json",
+    "characters": "characters.json"
+}
+# characters.json is optional; the game can run without character cards
+REQUIRED_DATA_FILES = {"source_log", "signers", "timeline"}
+DEFAULT_DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+BUNDLE_NAME = "game_data.bundle.json"
+BUNDLE_VERSION = 1
+
+# SourceLog sections the game needs; download records stay tools-only
+SOURCE_LOG_SECTIONS = ["sources", "source_categories", "evidence_levels", "usage_notes"]
+
+# Timeline entries may only be known to the month
+ISO_DATE = re.compile(r"^\d{4}-\d{2}(-\d{2})?$")
+SIGNER_REQUIRED_FIELDS = ["name", "colony", "signed_date", "signing_order", "evidence_level", "source_id"]
+TIMELINE_REQUIRED_FIELDS = ["date", "event", "source_id"]
+CHARACTER_REQUIRED_FIELDS = ["id", "name", "source_id"]
+
+
+@dataclass
+class ValidationIssue:
+    """A referential or schema problem found in the game data"""
+    severity: str  # 'error' or 'warning'
+    file: str
+    record: str
+    message: str
+
+
+def file_fingerprint(path: Path) -> List[int]:
+    """Size and mtime of a file, used to tell whether a bundle is stale"""
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class GameData:
+    """Indexed, read-only view over the game's historical data files
+
+    Indexes map keys to positions in the signers, timeline and characters
+    lists, so the same structures can be written to the bundle as-is.
+    """
+
+    def __init__(self, source_log: Dict, signers: Dict, timeline: Dict, characters: Dict,
+                 indexes: Optional[Dict] = None):
+        self.source_log = {key: source_log[key] for key in SOURCE_LOG_SECTIONS if key in source_log}
+        self.sources: Dict[str, Dict] = self.source_log.get("sources", {})
+        self.signers: List[Dict] = signers.get("signers", [])
+        self.signer_info = {key: value for key, value in signers.items() if key != "signers"}
+        self.timeline: List[Dict] = timeline.get("timeline", [])
+        self.characters: List[Dict] = characters.get("characters", [])
+        self.indexes = indexes if indexes is not None else self.build_indexes()
+
+    @classmethod
+    def from_files(cls, data_dir: str) -> "GameData":
+        """Parse the raw JSON data files; a missing required file is an error"""
+        data_dir = Path(data_dir)
+        loaded = {}
+        for key, filename in DATA_FILES.items():
+            try:
+                with open(data_dir / filename, 'r', encoding='utf-8') as f:
+                    loaded[key] = json.load(f)
+            except FileNotFoundError:
+                if key in REQUIRED_DATA_FILES:
+                    raise FileNotFoundError(f"Required game data file not found: {data_dir / filename}") from None
+                loaded[key] = {}
+        return cls(**loaded)
+
+    @classmethod
+    def load(cls, data_dir: str, use_bundle: bool = True) -> "GameData":
+        """Load from the bundle when it is up to date, else from the raw files"""
+        data_dir = Path(data_dir)
+        bundle_path = data_dir / BUNDLE_NAME
+        if use_bundle and bundle_path.exists():
+            with open(bundle_path, 'r', encoding='utf-8') as f:
+                bundle = json.load(f)
+            if bundle.get("version") == BUNDLE_VERSION and bundle.get("fingerprints") == cls.fingerprints(data_dir):
+                return cls(
+                    bundle["source_log"],
+                    dict(bundle["signer_info"], signers=bundle["signers"]),
+                    {"timeline": bundle["timeline"]},
+                    {"characters": bundle["characters"]},
+                    indexes=bundle["indexes"]
+                )
+        return cls.from_files(str(data_dir))
+
+    @staticmethod
+    def fingerprints(data_dir: Path) -> Dict[str, List[int]]:
+        """Fingerprints of whichever raw data files exist"""
+        return {
+            filename: file_fingerprint(data_dir / filename)
+            for filename in DATA_FILES.values()
+            if (data_dir / filename).exists()
+        }
+
+    def build_indexes(self) -> Dict[str, Dict]:
+        """Build every lookup index in one pass per list"""
+        signers_by = {name: defaultdict(list) for name in
+                      ("colony", "signed_date", "evidence_level", "source_id")}
+        signers_by_order = {}
+        for position, signer in enumerate(self.signers):
+            for field, index in signers_by.items():
+                if field in signer:
+                    index[str(signer[field])].append(position)
+            if "signing_order" in signer:
+                signers_by_order[str(signer["signing_order"])] = position
+
+        timeline_by_date = defaultdict(list)
+        timeline_by_source = defaultdict(list)
+        for position, event in enumerate(self.timeline):
+            timeline_by_date[event.get("date", "")].append(position)
+            timeline_by_source[event.get("source_id", "")].append(position)
+
+        characters_by_id = {}
+        characters_by_source = defaultdict(list)
+        for position, character in enumerate(self.characters):
+            characters_by_id[character.get("id", "")] = position
+            characters_by_source[character.get("source_id", "")].append(position)
+
+        return {
+            "signers_by_colony": dict(signers_by["colony"]),
+            "signers_by_signed_date": dict(signers_by["signed_date"]),
+            "signers_by_evidence_level": dict(signers_by["evidence_level"]),
+            "signers_by_source_id": dict(signers_by["source_id"]),
+            "signers_by_signing_order": signers_by_order,
+            "timeline_by_date": dict(timeline_by_date),
+            "timeline_by_source_id": dict(timeline_by_source),
+            "characters_by_id": characters_by_id,
+            "characters_by_source_id": dict(characters_by_source)
+        }
+
+    def find_signers(self, colony: Optional[str] = None, signed_date: Optional[str] = None,
+                     evidence_level: Optional[str] = None, source_id: Optional[str] = None) -> List[Dict]:
+        """Signers matching every given filter, in signing order"""
+        filters = [
+            ("signers_by_colony", colony),
+            ("signers_by_signed_date", signed_date),
+            ("signers_by_evidence_level", evidence_level),
+            ("signers_by_source_id", source_id)
+        ]
+        positions = None
+        for index_name, value in filters:
+            if value is None:
+                continue
+            matches = set(self.indexes[index_name].get(value, []))
+            positions = matches if positions is None else positions & matches
+        if positions is None:
+            positions = range(len(self.signers))
+        return sorted((self.signers[p] for p in positions), key=lambda s: s.get("signing_order", 0))
+
+    def signer_by_order(self, signing_order: int) -> Optional[Dict]:
+        """The signer at a given position in the signing order"""
+        position = self.indexes["signers_by_signing_order"].get(str(signing_order))
+        return self.signers[position] if position is not None else None
+
+    def events_on(self, date: str) -> List[Dict]:
+        """Timeline events on a date (YYYY-MM-DD)"""
+        return [self.timeline[p] for p in self.indexes["timeline_by_date"].get(date, [])]
+
+    def character(self, character_id: str) -> Optional[Dict]:
+        """A playable character by id"""
+        position = self.indexes["characters_by_id"].get(character_id)
+        return self.characters[position] if position is not None else None
+
+    def source(self, source_id: str) -> Optional[Dict]:
+        """A SourceLog source by id"""
+        return self.sources.get(source_id)
+
+    def citing(self, source_id: str) -> Dict[str, List[Dict]]:
+        """Every signer, timeline event and character citing a source"""
+        return {
+            "signers": [self.signers[p] for p in self.indexes["signers_by_source_id"].get(source_id, [])],
+            "timeline": [self.timeline[p] for p in self.indexes["timeline_by_source_id"].get(source_id, [])],
+            "characters": [self.characters[p] for p in self.indexes["characters_by_source_id"].get(source_id, [])]
+        }
+
+    def validate(self) -> List[ValidationIssue]:
+        """Check schema and referential integrity in a single pass over the data"""
+        issues = []
+        evidence_levels = self.source_log.get("evidence_levels", {})
+        categories = self.source_log.get("source_categories", {})
+
+        def check(condition: bool, severity: str, file: str, record: str, message: str):
+            if not condition:
+                issues.append(ValidationIssue(severity, file, record, message))
+
+        for source_id, source in self.sources.items():
+            check(source.get("id", source_id) == source_id, "error", "SourceLog.json", source_id,
+                  f"id field '{source.get('id')}' does not match its key")
+            check(not categories or source.get("type") in categories, "warning", "SourceLog.json", source_id,
+                  f"unknown source type '{source.get('type')}'")
+
+        seen_orders = {}
+        for signer in self.signers:
+            name = signer.get("name", "<unnamed>")
+            for field in SIGNER_REQUIRED_FIELDS:
+                check(field in signer, "error", "signers.json", name, f"missing {field}")
+            check(signer.get("source_id") in self.sources, "error", "signers.json", name,
+                  f"source_id '{signer.get('source_id')}' not found in SourceLog sources")
+            check(not evidence_levels or signer.get("evidence_level") in evidence_levels, "error",
+                  "signers.json", name, f"unknown evidence_level '{signer.get('evidence_level')}'")
+            check(bool(ISO_DATE.match(str(signer.get("signed_date", "")))), "error", "signers.json", name,
+                  f"signed_date '{signer.get('signed_date')}' is not YYYY-MM[-DD]")
+            order = signer.get("signing_order")
+            check(order not in seen_orders, "error", "signers.json", name,
+                  f"signing_order {order} already used by {seen_orders.get(order)}")
+            seen_orders.setdefault(order, name)
+
+        expected_total = self.signer_info.get("signing_statistics", {}).get("total_signers")
+        check(expected_total is None or expected_total == len(self.signers), "warning", "signers.json",
+              "signing_statistics", f"total_signers is {expected_total} but {len(self.signers)} signers are listed")
+
+        for event in self.timeline:
+            label = f"{event.get('date', '?')} {event.get('event', '<no event>')}"
+            for field in TIMELINE_REQUIRED_FIELDS:
+                check(field in event, "error", "timeline.json", label, f"missing {field}")
+            check(event.get("source_id") in self.sources, "error", "timeline.json", label,
+                  f"source_id '{event.get('source_id')}' not found in SourceLog sources")
+            check(bool(ISO_DATE.match(str(event.get("date", "")))), "error", "timeline.json", label,
+                  f"date '{event.get('date')}' is not YYYY-MM[-DD]")
+
+        seen_characters = set()
+        for character in self.characters:
+            character_id = character.get("id", "<no id>")
+            for field in CHARACTER_REQUIRED_FIELDS:
+                check(field in character, "error", "characters.json", character_id, f"missing {field}")
+            check(character.get("source_id") in self.sources, "error", "characters.json", character_id,
+                  f"source_id '{character.get('source_id')}' not found in SourceLog sources")
+            check(character_id not in seen_characters, "error", "characters.json", character_id, "duplicate id")
+            seen_characters.add(character_id)
+
+        return issues
+
+    def to_bundle(self, data_dir: Path) -> Dict:
+        """Everything needed to rebuild this view without reparsing the raw files"""
+        return {
+            "version": BUNDLE_VERSION,
+            "fingerprints": self.fingerprints(data_dir),
+            "source_log": self.source_log,
+            "signer_info": self.signer_info,
+            "signers": self.signers,
+            "timeline": self.timeline,
+            "characters": self.characters,
+            "indexes": self.indexes
+        }
+
+    def export_bundle(self, data_dir: str, bundle_path: Optional[str] = None) -> Path:
+        """Write the minified bundle atomically and return its path"""
+        data_dir = Path(data_dir)
+        bundle_path = Path(bundle_path) if bundle_path else data_dir / BUNDLE_NAME
+        temp_path = bundle_path.with_name(bundle_path.name + ".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_bundle(data_dir), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(temp_path, bundle_path)
+        return bundle_path
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Validate, query and bundle the Declaration game data")
+    parser.add_argument("--data-dir", default=str(DEFAULT_DATA_DIR),
+                        help="Directory containing the game JSON data (default: the project's data/)")
+    parser.add_argument("--validate", action="store_true", help="Check referential integrity")
+    parser.add_argument("--strict", action="store_true", help="With --validate, fail on warnings too")
+    parser.add_argument("--export", nargs="?", const="", metavar="PATH",
+                        help=f"Write the minified bundle (default: <data-dir>/{BUNDLE_NAME})")
+    parser.add_argument("--colony", help="List signers from this colony")
+    parser.add_argument("--signed-date", help="List signers who signed on this date")
+    parser.add_argument("--evidence-level", help="List signers with this evidence level")
+    parser.add_argument("--source-id", help="List records citing this source")
+
+    args = parser.parse_args()
+
+    # Validation and export always work from the raw files
+    use_bundle = not (args.validate or args.export is not None)
+    try:
+        data = GameData.load(args.data_dir, use_bundle=use_bundle)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    exit_code = 0
+
+    if args.validate:
+        issues = data.validate()
+        errors = [issue for issue in issues if issue.severity == "error"]
+        for issue in issues:
+            print(f"  {issue.severity.upper()} {issue.file} [{issue.record}]: {issue.message}")
+        print(f"Validation: {len(errors)} errors, {len(issues) - len(errors)} warnings")
+        if errors or (args.strict and issues):
+            exit_code = 1
+
+    if args.export is not None:
+        bundle_path = data.export_bundle(args.data_dir, args.export or None)
+        print(f"Bundle saved: {bundle_path} ({bundle_path.stat().st_size / 1024:.1f} KB)")
+
+    if args.colony or args.signed_date or args.evidence_level:
+        for signer in data.find_signers(args.colony, args.signed_date, args.evidence_level, args.source_id):
+            print(f"  {signer.get('signing_order', '?'):>3}. {signer['name']} ({signer.get('colony')})")
+    elif args.source_id:
+        source = data.source(args.source_id)
+        print(f"{args.source_id}: {source['title'] if source else 'not in SourceLog'}")
+        print(json.dumps(data.citing(args.source_id), indent=2, ensure_ascii=False))
+
+    raise SystemExit(exit_code)
+
+if __name__ == "__main__":
+    main()
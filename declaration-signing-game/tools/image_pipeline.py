@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Image Derivative Pipeline for Declaration of Independence Game
+Builds Godot-ready textures from downloaded archival scans: a capped-resolution
+(optionally power-of-two) base image, its mipmap chain and a thumbnail
+Requires Pillow
+"""
+
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from PIL import Image
+
+DEFAULT_MAX_SIZE = 2048
+DEFAULT_THUMBNAIL_SIZE = 256
+MIN_MIP_SIZE = 64
+JPEG_QUALITY = 90
+
+# Archival scans can exceed Pillow's decompression-bomb guard
+Image.MAX_IMAGE_PIXELS = None
+
+
+def derivative_settings(max_size: int = DEFAULT_MAX_SIZE, power_of_two: bool = False,
+                        thumbnail_size: int = DEFAULT_THUMBNAIL_SIZE) -> Dict:
+    """Settings that determine derivative output; part of the cache key"""
+    return {
+        "max_size": max_size,
+        "power_of_two": power_of_two,
+        "thumbnail_size": thumbnail_size,
+        "min_mip_size": MIN_MIP_SIZE
+    }
+
+
+def floor_power_of_two(value: int) -> int:
+    """Largest power of two not greater than value"""
+    return 1 << (max(1, value).bit_length() - 1)
+
+
+def base_size(width: int, height: int, settings: Dict) -> Tuple[int, int]:
+    """Size of the base derivative for a source image"""
+    scale = min(1.0, settings["max_size"] / max(width, height))
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    if settings["power_of_two"]:
+        size = (floor_power_of_two(size[0]), floor_power_of_two(size[1]))
+    return size
+
+
+def save_image(image: Image.Image, path: Path) -> Dict:
+    """Save a derivative and describe it for the source log
+    
+    Images with alpha are always PNG, so their suffix follows the format
+    actually written; Godot imports by extension.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if image.mode in ("RGBA", "LA") or path.suffix.lower() == ".png":
+        path = path.with_suffix(".png")
+        image.save(path, format="PNG", optimize=True)
+    else:
+        image.convert("RGB").save(path, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    return {
+        "path": str(path),
+        "width": image.width,
+        "height": image.height,
+        "file_size": path.stat().st_size
+    }
+
+
+def build_derivatives(source_path: str, output_stem: str, settings: Dict) -> List[Dict]:
+    """Build the base texture, mipmaps and thumbnail for one source image
+
+    Outputs are written next to output_stem, e.g. <stem>_2048.jpg,
+    <stem>_mip1.jpg ... and <stem>_thumb.jpg. Runs in a worker process,
+    so arguments and the result are plain data.
+    """
+    output_stem = Path(output_stem)
+    suffix = ".png" if output_stem.suffix.lower() == ".png" else ".jpg"
+    stem = output_stem.with_suffix("")
+    outputs = []
+
+    with Image.open(source_path) as source:
+        source.draft("RGB", base_size(source.width, source.height, settings))
+        image = source.convert("RGBA" if "A" in source.getbands() else "RGB")
+
+    base = image.resize(base_size(image.width, image.height, settings), Image.LANCZOS)
+    outputs.append(dict(save_image(base, stem.with_name(f"{stem.name}_{max(base.size)}{suffix}")), kind="base"))
+
+    # Each mip level halves the previous one, like the GPU would
+    level, mip = 0, base
+    while max(mip.size) // 2 >= settings["min_mip_size"]:
+        level += 1
+        mip = mip.resize((max(1, mip.width // 2), max(1, mip.height // 2)), Image.LANCZOS)
+        outputs.append(dict(save_image(mip, stem.with_name(f"{stem.name}_mip{level}{suffix}")), kind="mip", level=level))
+
+    thumbnail = base.copy()
+    thumbnail.thumbnail((settings["thumbnail_size"], settings["thumbnail_size"]), Image.LANCZOS)
+    outputs.append(dict(save_image(thumbnail, stem.with_name(f"{stem.name}_thumb{suffix}")), kind="thumbnail"))
+
+    return outputs
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Metadata Enrichment for Declaration of Independence Game
+Resolves catalog URLs against the LoC JSON API and the Wikimedia Commons
+imageinfo API, in concurrent batched requests, and merges licence, dimensions
+and the canonical file URL into data/asset_catalog.jsonl
+Responses are cached on disk with a TTL; a directory of recorded responses
+can be replayed with --fixtures so no network is needed
+"""
+
+import os
+import re
+import sys
+import json
+import fnmatch
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import unquote, urlencode
+
+import requests
+
+from download_assets import DEFAULT_MAX_WORKERS, HistoricalAssetDownloader, read_catalog_lines
+
+LOC_ITEM_URL = re.compile(r"^https?://(?:www\.)?loc\.gov/(?:resource|item|pictures/item)/[^?#]+")
+COMMONS_FILE_URL = re.compile(
+    r"^https?://(?:upload\.wikimedia\.org/wikipedia/commons/(?:thumb/)?[0-9a-f]/[0-9a-f]{2}/"
+    r"|commons\.wikimedia\.org/wiki/File:)(?P<name>[^/?#]+)"
+)
+COMMONS_API_URL = "https://commons.wikimedia.org/w/api.php"
+# The imageinfo API accepts up to 50 titles per request
+COMMONS_BATCH_SIZE = 50
+COMMONS_EXTMETADATA = "LicenseShortName|LicenseUrl|UsageTerms|Artist"
+
+DEFAULT_CACHE_TTL_DAYS = 7
+# Fixture key for a whole imageinfo API response, expanded into per-title entries
+COMMONS_BATCH_KEY = "commons-batch"
+HTML_TAG = re.compile(r"<[^>]+>")
+
+
+def cache_key_name(key: str) -> str:
+    """File name of a cache entry"""
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest() + ".json"
+
+
+def loc_json_url(url: str) -> Optional[str]:
+    """LoC JSON API URL for an item or resource page, or None for other URLs"""
+    match = LOC_ITEM_URL.match(url)
+    if not match:
+        return None
+    return match.group(0).rstrip("/") + "/?fo=json"
+
+
+def commons_title(url: str) -> Optional[str]:
+    """Commons file page title for an upload or file page URL, or None for other URLs"""
+    match = COMMONS_FILE_URL.match(url)
+    if not match:
+        return None
+    return "File:" + unquote(match.group("name")).replace("_", " ")
+
+
+def plain_text(value) -> Optional[str]:
+    """Flatten a metadata value that may be a list or contain HTML"""
+    if isinstance(value, list):
+        value = "; ".join(str(item) for item in value if item)
+    if not value:
+        return None
+    return HTML_TAG.sub("", str(value)).strip() or None
+
+
+def summarize_loc(data: Dict, json_url: str) -> Optional[Dict]:
+    """Pick licence, dimensions and the best image file from an LoC ?fo=json response
+
+    The largest JPEG is preferred, since it loads directly in Godot;
+    TIFF masters are only used when no JPEG exists.
+    """
+    item = data.get("item") or {}
+    files = [
+        entry
+        for resource in data.get("resources") or []
+        for group in resource.get("files") or []
+        for entry in group
+        if isinstance(entry, dict) and entry.get("url") and str(entry.get("mimetype", "")).startswith("image/")
+    ]
+    if not files:
+        return None
+    best = max(files, key=lambda entry: (
+        entry.get("mimetype") == "image/jpeg",
+        (entry.get("width") or 0) * (entry.get("height") or 0)
+    ))
+    return {
+        "source": "loc",
+        "title": plain_text(item.get("title")),
+        "license": plain_text(item.get("rights_advisory") or item.get("rights")),
+        "license_url": None,
+        "artist": plain_text(item.get("contributor_names") or item.get("creator")),
+        "file_url": best["url"],
+        "width": best.get("width"),
+        "height": best.get("height"),
+        "mime": best.get("mimetype"),
+        "file_size": best.get("size"),
+        "description_url": json_url.split("?")[0]
+    }
+
+
+def summarize_commons(page: Dict) -> Optional[Dict]:
+    """Pick licence, dimensions and the original file URL from a Commons imageinfo page"""
+    if page.get("missing") or not page.get("imageinfo"):
+        return None
+    info = page["imageinfo"][0]
+    extmetadata = info.get("extmetadata") or {}
+
+    def meta(name: str) -> Optional[str]:
+        return plain_text((extmetadata.get(name) or {}).get("value"))
+
+    return {
+        "source": "commons",
+        "title": page.get("title"),
+        "license": meta("LicenseShortName") or meta("UsageTerms"),
+        "license_url": meta("LicenseUrl"),
+        "artist": meta("Artist"),
+        "file_url": info.get("url"),
+        "width": info.get("width"),
+        "height": info.get("height"),
+        "mime": info.get("mime"),
+        "file_size": info.get("size"),
+        "description_url": info.get("descriptionurl")
+    }
+
+
+def commons_pages(data: Dict) -> Dict[str, Dict]:
+    """Pages of an imageinfo API response, keyed by the titles that were requested"""
+    query = data.get("query") or {}
+    # The API may rename titles (e.g. first-letter case); map them back
+    renamed = {entry["to"]: entry["from"] for entry in query.get("normalized") or []}
+    return {
+        renamed.get(page.get("title"), page.get("title")): page
+        for page in query.get("pages") or []
+    }
+
+
+class MetadataCache:
+    """On-disk cache of API responses, one JSON file per key, expiring after a TTL
+
+    Offline caches never expire entries and never touch the network;
+    that is how recorded fixtures are replayed. In offline mode files may
+    have any name: each holds {"key": ..., "response": ...}, where the key
+    is "loc:<?fo=json URL>", "commons:<File: title>" or "commons-batch"
+    for a whole imageinfo response.
+    """
+
+    def __init__(self, cache_dir: Path, ttl_seconds: float, offline: bool = False):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.offline = offline
+        self.fixtures = self.load_fixtures() if offline else {}
+
+    def load_fixtures(self) -> Dict[str, Dict]:
+        """Index every response in the directory by its key"""
+        fixtures = {}
+        for path in sorted(self.cache_dir.glob("*.json")):
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if entry.get("key") == COMMONS_BATCH_KEY:
+                for title, page in commons_pages(entry["response"]).items():
+                    fixtures[f"commons:{title}"] = page
+            elif entry.get("key"):
+                fixtures[entry["key"]] = entry["response"]
+        return fixtures
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached response for a key, or None if missing or expired"""
+        if self.offline:
+            return self.fixtures.get(key)
+        try:
+            with open(self.cache_dir / cache_key_name(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if time.time() - entry.get("fetched_at", 0) > self.ttl_seconds:
+            return None
+        return entry["response"]
+
+    def put(self, key: str, response: Dict):
+        """Atomically store a response"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.cache_dir / cache_key_name(key)
+        temp_path = path.with_name(path.name + ".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"key": key, "fetched_at": time.time(), "response": response}, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def evict_expired(self) -> int:
+        """Delete expired entries, returning how many were removed"""
+        if self.offline or not self.cache_dir.exists():
+            return 0
+        evicted = 0
+        now = time.time()
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    fetched_at = json.load(f).get("fetched_at", 0)
+            except (OSError, json.JSONDecodeError):
+                fetched_at = 0
+            if now - fetched_at > self.ttl_seconds:
+                path.unlink(missing_ok=True)
+                evicted += 1
+        return evicted
+
+
+class MetadataEnricher:
+    """Resolves catalog URLs through the downloader's pooled, rate-limited sessions"""
+
+    def __init__(self, downloader: HistoricalAssetDownloader, cache: MetadataCache,
+                 max_workers: int = DEFAULT_MAX_WORKERS):
+        self.downloader = downloader
+        self.cache = cache
+        self.max_workers = max(1, max_workers)
+        self.stats = {"cached": 0, "requests": 0}
+        self.lock = threading.Lock()
+
+    def count(self, stat: str):
+        """Bump a counter shared by the lookup threads"""
+        with self.lock:
+            self.stats[stat] += 1
+
+    def fetch_json(self, url: str) -> Dict:
+        """GET a JSON API response, with the downloader's retries and host limits"""
+        response, _ = self.downloader.request_with_retries("GET", url)
+        with response:
+            response.raise_for_status()
+            self.count("requests")
+            return response.json()
+
+    def resolve_loc(self, url: str) -> Optional[Dict]:
+        """Resolve one LoC item or resource page"""
+        json_url = loc_json_url(url)
+        key = f"loc:{json_url}"
+        data = self.cache.get(key)
+        if data is not None:
+            self.count("cached")
+        elif self.cache.offline:
+            return None
+        else:
+            try:
+                data = self.fetch_json(json_url)
+            except (requests.RequestException, ValueError) as e:
+                print(f"  LoC lookup failed for {url}: {str(e)}")
+                return None
+            self.cache.put(key, data)
+        return summarize_loc(data, json_url)
+
+    def fetch_commons_batch(self, titles: List[str]) -> Dict[str, Dict]:
+        """Fetch imageinfo pages for up to COMMONS_BATCH_SIZE titles in one request"""
+        url = COMMONS_API_URL + "?" + urlencode({
+            "action": "query",
+            "format": "json",
+            "formatversion": 2,
+            "prop": "imageinfo",
+            "iiprop": "url|size|mime|extmetadata",
+            "iiextmetadatafilter": COMMONS_EXTMETADATA,
+            "titles": "|".join(titles)
+        })
+        try:
+            data = self.fetch_json(url)
+        except (requests.RequestException, ValueError) as e:
+            print(f"  Commons lookup failed for {len(titles)} titles: {str(e)}")
+            return {}
+        pages = commons_pages(data)
+        for title, page in pages.items():
+            self.cache.put(f"commons:{title}", page)
+        return pages
+
+    def resolve_commons(self, titles: List[str], executor: ThreadPoolExecutor) -> Dict[str, Optional[Dict]]:
+        """Resolve Commons titles, from the cache or in batched requests"""
+        pages = {}
+        pending = []
+        for title in dict.fromkeys(titles):
+            page = self.cache.get(f"commons:{title}")
+            if page is not None:
+                self.count("cached")
+                pages[title] = page
+            elif not self.cache.offline:
+                pending.append(title)
+        batches = [pending[i:i + COMMONS_BATCH_SIZE] for i in range(0, len(pending), COMMONS_BATCH_SIZE)]
+        for fetched in executor.map(self.fetch_commons_batch, batches):
+            pages.update(fetched)
+        return {title: summarize_commons(pages[title]) if title in pages else None for title in titles}
+
+    def resolve(self, urls: List[str]) -> Dict[str, Optional[Dict]]:
+        """Resolve catalog URLs to metadata summaries; None where unresolved
+
+        LoC pages are looked up one per request, concurrently; Commons
+        files are batched. Other URLs (e.g. IIIF image requests) are
+        left out of the result.
+        """
+        loc_urls = [url for url in dict.fromkeys(urls) if loc_json_url(url)]
+        titles = {url: commons_title(url) for url in dict.fromkeys(urls) if commons_title(url)}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            loc_results = executor.map(self.resolve_loc, loc_urls)
+            commons = self.resolve_commons(list(titles.values()), executor)
+            results = dict(zip(loc_urls, loc_results))
+        results.update({url: commons[title] for url, title in titles.items()})
+        return results
+
+
+def enrich_catalog(catalog_path: Path, enricher: MetadataEnricher,
+                   id_patterns: Optional[List[str]] = None, update_urls: bool = False,
+                   dry_run: bool = False) -> Dict[str, int]:
+    """Merge resolved metadata into each catalog record's metadata["resolved"]
+
+    Hand-written metadata is left as is. With update_urls, LoC page URLs
+    are replaced by the resolved image file URL so the downloader fetches
+    the image instead of the HTML page. Comment and blank lines are kept
+    as they are when the catalog is rewritten.
+    """
+    lines = list(read_catalog_lines(catalog_path))
+
+    selected = [
+        record for _, record in lines
+        if record is not None
+        and (not id_patterns or any(fnmatch.fnmatchcase(record["id"], p) for p in id_patterns))
+    ]
+    results = enricher.resolve([record["url"] for record in selected])
+    counts = {"resolved": 0, "unresolved": 0, "unsupported": 0, "urls_updated": 0}
+
+    resolved_at = time.strftime("%Y-%m-%d %H:%M:%S")
+    for record in selected:
+        if record["url"] not in results:
+            counts["unsupported"] += 1
+            continue
+        summary = results[record["url"]]
+        if summary is None:
+            counts["unresolved"] += 1
+            print(f"  Unresolved: {record['id']} ({record['url']})")
+            continue
+        counts["resolved"] += 1
+        record.setdefault("metadata", {})["resolved"] = dict(summary, resolved_at=resolved_at)
+        print(f"  {record['id']}: {summary['license'] or 'no licence'}, "
+              f"{summary['width']}x{summary['height']} {summary['mime']}")
+        if update_urls and summary["source"] == "loc" and summary["file_url"] != record["url"]:
+            record["url"] = summary["file_url"]
+            counts["urls_updated"] += 1
+
+    if not dry_run and counts["resolved"]:
+        temp_path = catalog_path.with_name(catalog_path.name + ".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for line, record in lines:
+                if record is None:
+                    f.write(line if line.endswith("\n") else line + "\n")
+                else:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(temp_path, catalog_path)
+    return counts
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Resolve LoC and Wikimedia metadata into the asset catalog")
+    parser.add_argument("--project-root", default=".", help="Project root directory")
+    parser.add_argument("--catalog", help="Asset catalog file (JSON Lines)")
+    parser.add_argument("--id", dest="id_patterns", action="append",
+                        help="Enrich only asset ids matching this glob (repeatable)")
+    parser.add_argument("--cache-dir", help="Response cache directory (default tools/metadata_cache)")
+    parser.add_argument("--ttl-days", type=float, default=DEFAULT_CACHE_TTL_DAYS,
+                        help="Refetch cached responses older than this")
+    parser.add_argument("--fixtures", help="Replay recorded responses from this directory; no network access")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help="Concurrent lookups")
+    parser.add_argument("--update-urls", action="store_true",
+                        help="Replace LoC page URLs with the resolved image file URL")
+    parser.add_argument("--dry-run", action="store_true", help="Resolve and report without writing the catalog")
+
+    args = parser.parse_args()
+
+    downloader = HistoricalAssetDownloader(args.project_root, max_workers=args.workers)
+    catalog_path = Path(args.catalog) if args.catalog else downloader.catalog_path
+    if args.fixtures:
+        cache = MetadataCache(Path(args.fixtures), 0, offline=True)
+    else:
+        cache_dir = Path(args.cache_dir) if args.cache_dir else downloader.project_root / "tools" / "metadata_cache"
+        cache = MetadataCache(cache_dir, args.ttl_days * 86400)
+        evicted = cache.evict_expired()
+        if evicted:
+            print(f"Evicted {evicted} expired cache entries")
+
+    enricher = MetadataEnricher(downloader, cache, max_workers=args.workers)
+    print(f"Enriching {catalog_path}...")
+    try:
+        counts = enrich_catalog(catalog_path, enricher, args.id_patterns, args.update_urls, args.dry_run)
+    finally:
+        downloader.close_sessions()
+
+    print(f"Resolved {counts['resolved']}, unresolved {counts['unresolved']}, "
+          f"unsupported {counts['unsupported']}; {enricher.stats['requests']} API requests, "
+          f"{enricher.stats['cached']} cache hits")
+    if counts["urls_updated"]:
+        print(f"Updated {counts['urls_updated']} URLs to image files")
+    if counts["unresolved"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
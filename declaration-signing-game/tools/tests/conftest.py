@@ -0,0 +1,76 @@
+"""Shared fixtures for the asset tool checks; no network access needed"""
+
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# The tools import each other as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class ArchiveHandler(BaseHTTPRequestHandler):
+    """Serves the server's files dict: path -> (body, etag, content type) or a status"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without TCP_NODELAY each
+    # response stalls on the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def respond(self, send_body: bool):
+        self.server.requests.append(self.path)
+        entry = self.server.files.get(self.path.split("?")[0])
+        if entry is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if isinstance(entry, int):
+            # A bare status, e.g. 429, answered with a long Retry-After
+            self.send_response(entry)
+            self.send_header("Retry-After", "300")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body, etag, content_type = entry
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+
+@pytest.fixture
+def archive():
+    """A local archive server whose files can be changed between runs"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ArchiveHandler)
+    server.daemon_threads = True
+    server.files = {}
+    server.requests = []
+    server.host = f"127.0.0.1:{server.server_port}"
+    server.base_url = f"http://{server.host}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
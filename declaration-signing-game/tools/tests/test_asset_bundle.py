@@ -0,0 +1,59 @@
+"""Checks for asset_bundle.py export and import"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+import asset_bundle
+from asset_bundle import PACK_MAGIC, PACK_TRAILER, export_pack, import_pack
+from download_assets import HistoricalAssetDownloader
+
+
+def seed_project(root: Path) -> HistoricalAssetDownloader:
+    """A project with one downloaded asset, stored the way the downloader does"""
+    target = root / "assets" / "portraits" / "a.jpg"
+    target.parent.mkdir(parents=True)
+    target.write_bytes(b"A" * 1000)
+    downloader = HistoricalAssetDownloader(str(root))
+    downloader.source_log["downloads"]["a"] = {
+        "asset_id": "a", "url": "http://archive.test/a.jpg", "local_path": "assets/portraits/a.jpg",
+        "file_hash": None
+    }
+    return downloader
+
+
+def write_pack(path: Path, index: dict):
+    index_bytes = json.dumps(index).encode("utf-8")
+    path.write_bytes(PACK_MAGIC + index_bytes + PACK_TRAILER.pack(len(PACK_MAGIC), len(index_bytes), PACK_MAGIC))
+
+
+def test_export_import_round_trip(tmp_path):
+    source, target = tmp_path / "source", tmp_path / "target"
+    source.mkdir()
+    target.mkdir()
+    export_pack(seed_project(source), tmp_path / "full.assetpack")
+
+    plan = import_pack(HistoricalAssetDownloader(str(target)), tmp_path / "full.assetpack")
+    assert plan["unpack"] == ["a"]
+    assert (target / "assets/portraits/a.jpg").read_bytes() == b"A" * 1000
+
+    plan = import_pack(HistoricalAssetDownloader(str(target)), tmp_path / "full.assetpack")
+    assert plan["unchanged"] == ["a"]
+
+
+@pytest.mark.parametrize("digest", ["../../data/SourceLog.json", "A" * 64, "a" * 63, "a" * 64 + "\n"])
+def test_import_rejects_crafted_digests(tmp_path, digest):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "SourceLog.json").write_text('{"sources": {}}', encoding="utf-8")
+    pack_path = tmp_path / "crafted.assetpack"
+    write_pack(pack_path, {
+        "version": asset_bundle.MANIFEST_VERSION,
+        "manifest": {"assets": {"x": {"digest": digest, "size": 1, "path": "assets/x.jpg"}}},
+        "downloads": {"x": {"asset_id": "x", "local_path": "assets/x.jpg"}},
+        "blobs": {digest: [len(PACK_MAGIC), 1]}
+    })
+
+    with pytest.raises(ValueError, match="invalid digest"):
+        import_pack(HistoricalAssetDownloader(str(tmp_path)), pack_path)
+    assert not (tmp_path / "assets").exists()
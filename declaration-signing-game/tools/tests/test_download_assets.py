@@ -0,0 +1,149 @@
+"""Checks for download_assets.py against a local archive server"""
+
+import json
+import time
+
+from download_assets import AssetDownload, HistoricalAssetDownloader
+
+
+def make_asset(archive, asset_id: str = "a", path: str = "/a.jpg") -> AssetDownload:
+    return AssetDownload(
+        id=asset_id,
+        name=f"Asset {asset_id}",
+        url=archive.base_url + path,
+        description="Test asset",
+        source_org="Test Archive",
+        asset_type="portrait",
+        target_path=f"assets/portraits/{asset_id}.jpg",
+        metadata={}
+    )
+
+
+def make_downloader(tmp_path, archive, **options) -> HistoricalAssetDownloader:
+    return HistoricalAssetDownloader(
+        str(tmp_path), host_rate_limits={archive.host: (1000.0, 1000)}, **options
+    )
+
+
+def test_refresh_fetches_changed_content(tmp_path, archive):
+    asset = make_asset(archive)
+    archive.files["/a.jpg"] = (b"A" * 1000, '"v1"', "image/jpeg")
+    assert make_downloader(tmp_path, archive).download_asset(asset)
+
+    archive.files["/a.jpg"] = (b"B" * 1200, '"v2"', "image/jpeg")
+    downloader = make_downloader(tmp_path, archive, refresh=True)
+    assert downloader.download_asset(asset)
+    downloader.compact_source_log()
+
+    assert (tmp_path / asset.target_path).read_bytes() == b"B" * 1200
+    with open(tmp_path / "data" / "SourceLog.json", encoding="utf-8") as f:
+        entry = json.load(f)["downloads"]["a"]
+    assert entry["etag"] == '"v2"'
+    assert entry["file_size"] == 1200
+    # The superseded blob is pruned from the store
+    assert [blob.name for blob in downloader.store_dir.iterdir()] == [entry["file_blake2b"]]
+
+
+def test_refresh_keeps_old_blob_still_shared(tmp_path, archive):
+    archive.files["/a.jpg"] = (b"A" * 1000, '"v1"', "image/jpeg")
+    archive.files["/b.jpg"] = (b"A" * 1000, '"v1"', "image/jpeg")
+    downloader = make_downloader(tmp_path, archive)
+    assert downloader.download_asset(make_asset(archive, "a", "/a.jpg"))
+    assert downloader.download_asset(make_asset(archive, "b", "/b.jpg"))
+    old_digest = downloader.source_log["downloads"]["a"]["file_blake2b"]
+
+    archive.files["/a.jpg"] = (b"B" * 1000, '"v2"', "image/jpeg")
+    downloader = make_downloader(tmp_path, archive, refresh=True)
+    assert downloader.download_asset(make_asset(archive, "a", "/a.jpg"))
+
+    assert downloader.store_path(old_digest).exists()
+    assert (tmp_path / "assets/portraits/b.jpg").read_bytes() == b"A" * 1000
+
+
+def test_matching_etag_links_stored_blob(tmp_path, archive):
+    archive.files["/a.jpg"] = (b"A" * 1000, '"same"', "image/jpeg")
+    archive.files["/b.jpg"] = (b"A" * 1000, '"same"', "image/jpeg")
+    downloader = make_downloader(tmp_path, archive)
+    assert downloader.download_asset(make_asset(archive, "a", "/a.jpg"))
+    assert downloader.download_asset(make_asset(archive, "b", "/b.jpg"))
+
+    entry = downloader.source_log["downloads"]["b"]
+    assert entry["deduplicated"]
+    assert (tmp_path / entry["local_path"]).read_bytes() == b"A" * 1000
+
+
+def test_torn_journal_tail_is_cut_before_next_append(tmp_path, archive):
+    archive.files["/a.jpg"] = (b"A" * 1000, '"v1"', "image/jpeg")
+    archive.files["/b.jpg"] = (b"B" * 1000, '"v1"', "image/jpeg")
+    downloader = make_downloader(tmp_path, archive)
+    assert downloader.download_asset(make_asset(archive, "a", "/a.jpg"))
+
+    # Simulate a crash halfway through appending the next record
+    journal = downloader.source_log_journal_path
+    with open(journal, "a", encoding="utf-8") as f:
+        f.write('{"asset_id": "torn", "na')
+
+    downloader = make_downloader(tmp_path, archive)
+    assert "torn" not in downloader.source_log["downloads"]
+    assert downloader.download_asset(make_asset(archive, "b", "/b.jpg"))
+
+    # The record written after the restart survives another reload
+    reloaded = make_downloader(tmp_path, archive)
+    assert set(reloaded.source_log["downloads"]) == {"a", "b"}
+    assert journal.read_bytes().endswith(b"\n")
+
+
+def test_iiif_falls_back_to_direct_url_without_info_json(tmp_path, archive):
+    path = "/iiif/doc/full/pct:100/0/default.jpg"
+    archive.files[path] = (b"J" * 500, None, "image/jpeg")
+    downloader = make_downloader(tmp_path, archive)
+    assert downloader.download_asset(make_asset(archive, "doc", path))
+
+    assert "/iiif/doc/info.json" in archive.requests
+    assert (tmp_path / "assets/portraits/doc.jpg").read_bytes() == b"J" * 500
+
+
+def test_iiif_plan_keeps_requested_quality(tmp_path, archive):
+    info = {"width": 8000, "height": 6000, "maxWidth": 10000}
+    archive.files["/iiif/doc/info.json"] = (json.dumps(info).encode(), None, "application/json")
+    downloader = make_downloader(tmp_path, archive, iiif_max_dimension=2000)
+    plan = downloader.plan_iiif_fetch(make_asset(archive, "doc", "/iiif/doc/full/pct:100/0/gray.jpg"))
+
+    assert plan["url"] == f"{archive.base_url}/iiif/doc/full/2000,/0/gray.jpg"
+
+
+def test_size_schedule_does_not_probe_iiif_renders(tmp_path, archive):
+    archive.files["/small.jpg"] = (b"S" * 100, None, "image/jpeg")
+    archive.files["/large.jpg"] = (b"L" * 5000, None, "image/jpeg")
+    archive.files["/iiif/doc/full/pct:100/0/default.jpg"] = (b"I" * 100000, None, "image/jpeg")
+    assets = [
+        make_asset(archive, "doc", "/iiif/doc/full/pct:100/0/default.jpg"),
+        make_asset(archive, "large", "/large.jpg"),
+        make_asset(archive, "small", "/small.jpg"),
+    ]
+    downloader = make_downloader(tmp_path, archive, schedule="size")
+
+    assert [asset.id for asset in downloader.schedule_assets(assets)] == ["small", "large", "doc"]
+    assert not any(request.startswith("/iiif/") for request in archive.requests)
+
+
+def test_empty_selection_reports_without_crashing(tmp_path, archive):
+    downloader = make_downloader(tmp_path, archive)
+    downloader.asset_catalog = []
+    assert downloader.download_all_assets() == {}
+
+    with open(downloader.download_log_path, encoding="utf-8") as f:
+        assert json.load(f)["download_session"]["success_rate"] == "0.0%"
+
+
+def test_retry_after_does_not_outlast_time_budget(tmp_path, archive):
+    archive.files["/busy.jpg"] = 429
+    downloader = make_downloader(tmp_path, archive, max_duration=2.0, schedule="size")
+    downloader.asset_catalog = [make_asset(archive, "busy", "/busy.jpg")]
+
+    started = time.monotonic()
+    results = downloader.download_all_assets()
+
+    assert time.monotonic() - started < 2.0
+    assert results == {"busy": False}
+    assert downloader.skipped == ["busy"]
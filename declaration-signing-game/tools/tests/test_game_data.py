@@ -0,0 +1,20 @@
+"""Checks for game_data.py loading"""
+
+import json
+
+import pytest
+
+from game_data import DEFAULT_DATA_DIR, GameData
+
+
+def test_default_data_dir_is_the_project_data():
+    data = GameData.from_files(str(DEFAULT_DATA_DIR))
+    assert data.signers and data.timeline and data.sources
+
+
+def test_missing_required_file_is_an_error(tmp_path):
+    (tmp_path / "SourceLog.json").write_text(json.dumps({"sources": {}}), encoding="utf-8")
+    (tmp_path / "signers.json").write_text(json.dumps({"signers": []}), encoding="utf-8")
+
+    with pytest.raises(FileNotFoundError, match="timeline.json"):
+        GameData.from_files(str(tmp_path))
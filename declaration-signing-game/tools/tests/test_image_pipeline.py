@@ -0,0 +1,30 @@
+"""Checks for image_pipeline.py derivatives"""
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from image_pipeline import build_derivatives, derivative_settings
+
+
+def test_alpha_source_with_jpg_target_writes_png_files(tmp_path):
+    source = tmp_path / "portrait.jpg"
+    # PNG bytes behind a .jpg name, as an archive may serve them
+    Image.new("RGBA", (300, 200), (10, 20, 30, 128)).save(source, format="PNG")
+
+    outputs = build_derivatives(str(source), str(tmp_path / "derived" / "portrait.jpg"), derivative_settings())
+
+    assert outputs
+    for output in outputs:
+        assert output["path"].endswith(".png")
+        with Image.open(output["path"]) as image:
+            assert image.format == "PNG"
+
+
+def test_opaque_source_keeps_jpg_suffix(tmp_path):
+    source = tmp_path / "map.jpg"
+    Image.new("RGB", (300, 200), (200, 180, 150)).save(source, format="JPEG")
+
+    outputs = build_derivatives(str(source), str(tmp_path / "derived" / "map.jpg"), derivative_settings())
+
+    assert all(output["path"].endswith(".jpg") for output in outputs)
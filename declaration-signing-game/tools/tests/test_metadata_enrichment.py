@@ -0,0 +1,86 @@
+"""Checks for metadata_enrichment.py, replaying the fixtures in fixtures/metadata
+
+The fixtures follow the shape of the LoC ?fo=json and Commons imageinfo
+responses, trimmed to the fields the enrichment pass reads.
+"""
+
+import json
+import shutil
+import time
+from pathlib import Path
+
+from download_assets import HistoricalAssetDownloader, iter_asset_catalog
+from metadata_enrichment import MetadataCache, MetadataEnricher, cache_key_name, enrich_catalog
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "metadata"
+
+
+def enrich_offline(tmp_path, **options):
+    catalog_path = tmp_path / "asset_catalog.jsonl"
+    shutil.copy(FIXTURES / "catalog.jsonl", catalog_path)
+    enricher = MetadataEnricher(HistoricalAssetDownloader(str(tmp_path)), MetadataCache(FIXTURES, 0, offline=True))
+    counts = enrich_catalog(catalog_path, enricher, **options)
+    with open(catalog_path, encoding="utf-8") as f:
+        records = {record["id"]: record for record in map(json.loads, f)}
+    return counts, records, enricher
+
+
+def test_enrich_catalog_from_fixtures(tmp_path):
+    counts, records, enricher = enrich_offline(tmp_path)
+
+    assert counts == {"resolved": 3, "unresolved": 1, "unsupported": 1, "urls_updated": 0}
+    assert enricher.stats["requests"] == 0
+
+    loc = records["philly_map_1752"]["metadata"]
+    assert loc["cartographer"] == "Nicholas Scull"
+    assert loc["resolved"]["license"] == "No known restrictions on publication."
+    # The largest JPEG wins over the larger TIFF master
+    assert (loc["resolved"]["width"], loc["resolved"]["height"]) == (2048, 1432)
+    assert loc["resolved"]["mime"] == "image/jpeg"
+
+    jefferson = records["jefferson_portrait"]["metadata"]["resolved"]
+    assert jefferson["artist"] == "Rembrandt Peale"
+    assert jefferson["file_url"].endswith("Thomas_Jefferson_by_Rembrandt_Peale%2C_1800.jpg")
+
+    # Requested as benFranklinDuplessis.jpg; the batch normalized the title
+    franklin = records["franklin_portrait"]["metadata"]["resolved"]
+    assert franklin["title"] == "File:BenFranklinDuplessis.jpg"
+    assert franklin["license_url"] == "https://creativecommons.org/publicdomain/mark/1.0/"
+
+    assert "resolved" not in records["missing_file"]["metadata"]
+    assert "resolved" not in records["dunlap_broadside_image"]["metadata"]
+
+
+def test_update_urls_points_loc_pages_at_images(tmp_path):
+    counts, records, _ = enrich_offline(tmp_path, update_urls=True)
+
+    assert counts["urls_updated"] == 1
+    assert records["philly_map_1752"]["url"].endswith("/full/pct:25/0/default.jpg")
+    assert records["jefferson_portrait"]["url"].startswith("https://upload.wikimedia.org/")
+
+
+def test_comment_lines_survive_the_rewrite(tmp_path):
+    catalog_path = tmp_path / "asset_catalog.jsonl"
+    lines = (FIXTURES / "catalog.jsonl").read_text(encoding="utf-8").splitlines()
+    lines.insert(1, "# Portraits below are from Wikimedia Commons")
+    catalog_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    enricher = MetadataEnricher(HistoricalAssetDownloader(str(tmp_path)), MetadataCache(FIXTURES, 0, offline=True))
+
+    assert enrich_catalog(catalog_path, enricher)["resolved"] == 3
+    assert catalog_path.read_text(encoding="utf-8").splitlines()[1] == "# Portraits below are from Wikimedia Commons"
+    assert len(list(iter_asset_catalog(catalog_path))) == len(lines) - 1
+
+
+def test_cache_expires_and_evicts_after_ttl(tmp_path):
+    cache = MetadataCache(tmp_path, ttl_seconds=60)
+    cache.put("loc:fresh", {"item": {}})
+    cache.put("loc:stale", {"item": {}})
+    stale_path = tmp_path / cache_key_name("loc:stale")
+    entry = json.loads(stale_path.read_text(encoding="utf-8"))
+    entry["fetched_at"] = time.time() - 120
+    stale_path.write_text(json.dumps(entry), encoding="utf-8")
+
+    assert cache.get("loc:fresh") == {"item": {}}
+    assert cache.get("loc:stale") is None
+    assert cache.evict_expired() == 1
+    assert not stale_path.exists()